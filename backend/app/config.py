@@ -1,25 +1,57 @@
+import os
+from dataclasses import dataclass, field
 from typing import Optional
 
-from pydantic_settings import BaseSettings
+from dotenv import load_dotenv
 
+if os.path.exists(".env"):
+    load_dotenv(".env")
 
-class Settings(BaseSettings):
-    mongo_url: str = "mongodb://localhost:27017"
-    mongo_db: str = "rateright"
-    openai_api_key: Optional[str] = None
-    serpapi_key: Optional[str] = None
-    linkup_api_key: Optional[str] = None
-    linkup_only: bool = False
 
-    smtp_host: str = ""
-    smtp_port: int = 587
-    smtp_user: str = ""
-    smtp_password: str = ""
-    imap_host: str = ""
-    imap_port: int = 993
-    from_email: str = ""
+def _env_str(name: str, default: str = "") -> str:
+    return os.getenv(name, default)
 
-    model_config = {"env_file": ".env", "extra": "ignore"}
+
+def _env_opt(name: str) -> Optional[str]:
+    return os.getenv(name) or None
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    return int(raw) if raw else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    mongo_url: str = field(default_factory=lambda: _env_str("MONGO_URL", "mongodb://localhost:27017"))
+    mongo_db: str = field(default_factory=lambda: _env_str("MONGO_DB", "rateright"))
+    mongo_max_pool_size: int = field(default_factory=lambda: _env_int("MONGO_MAX_POOL_SIZE", 50))
+    mongo_min_pool_size: int = field(default_factory=lambda: _env_int("MONGO_MIN_POOL_SIZE", 5))
+    mongo_max_idle_ms: int = field(default_factory=lambda: _env_int("MONGO_MAX_IDLE_MS", 300_000))
+    mongo_max_connecting: int = field(default_factory=lambda: _env_int("MONGO_MAX_CONNECTING", 4))
+    openai_api_key: Optional[str] = field(default_factory=lambda: _env_opt("OPENAI_API_KEY"))
+    serpapi_key: Optional[str] = field(default_factory=lambda: _env_opt("SERPAPI_KEY"))
+    linkup_api_key: Optional[str] = field(default_factory=lambda: _env_opt("LINKUP_API_KEY"))
+    linkup_only: bool = field(default_factory=lambda: _env_bool("LINKUP_ONLY"))
+    openai_batch_extraction: bool = field(default_factory=lambda: _env_bool("OPENAI_BATCH_EXTRACTION"))
+
+    smtp_host: str = field(default_factory=lambda: _env_str("SMTP_HOST"))
+    smtp_port: int = field(default_factory=lambda: _env_int("SMTP_PORT", 587))
+    smtp_user: str = field(default_factory=lambda: _env_str("SMTP_USER"))
+    smtp_password: str = field(default_factory=lambda: _env_str("SMTP_PASSWORD"))
+    imap_host: str = field(default_factory=lambda: _env_str("IMAP_HOST"))
+    imap_port: int = field(default_factory=lambda: _env_int("IMAP_PORT", 993))
+    from_email: str = field(default_factory=lambda: _env_str("FROM_EMAIL"))
+    reply_check_interval_seconds: int = field(default_factory=lambda: _env_int("REPLY_CHECK_INTERVAL_SECONDS", 60))
+
+    cors_origins: str = field(default_factory=lambda: _env_str("CORS_ORIGINS", "http://localhost:3000"))
 
 
 settings = Settings()
@@ -1,64 +1,110 @@
+import asyncio
+import logging
+import os
+
 import certifi
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import GEOSPHERE, MongoClient
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+_CA_FILE = certifi.where()
+os.environ.setdefault("SSL_CERT_FILE", _CA_FILE)
+os.environ.setdefault("REQUESTS_CA_BUNDLE", _CA_FILE)
+
 client: AsyncIOMotorClient = None  # type: ignore[assignment]
-sync_client: MongoClient = None  # type: ignore[assignment]
+_sync_client: MongoClient | None = None
+_sync_client_lock = asyncio.Lock()
 
 
 def get_db():
     return client[settings.mongo_db]
 
 
-def get_sync_db():
-    """Synchronous DB handle — used by LangChain integrations that require pymongo."""
-    return sync_client[settings.mongo_db]
+async def get_sync_db():
+    """Synchronous DB handle — used by LangChain integrations that require pymongo.
+
+    The underlying MongoClient is created lazily on first use so processes that
+    never touch LangChain don't pay for a second pool and its monitor threads.
+    """
+    global _sync_client
+    if _sync_client is None:
+        async with _sync_client_lock:
+            if _sync_client is None:
+                _sync_client = await asyncio.to_thread(
+                    MongoClient,
+                    settings.mongo_url,
+                    tlsCAFile=_CA_FILE,
+                    serverSelectionTimeoutMS=3000,
+                    connectTimeoutMS=3000,
+                    socketTimeoutMS=5000,
+                    maxPoolSize=5,
+                    minPoolSize=0,
+                )
+    return _sync_client[settings.mongo_db]
+
+
+def _pool_options() -> dict:
+    return {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_ms,
+        "maxConnecting": settings.mongo_max_connecting,
+    }
 
 
 async def connect():
-    global client, sync_client
+    global client
     client = AsyncIOMotorClient(
         settings.mongo_url,
-        tlsCAFile=certifi.where(),
+        tlsCAFile=_CA_FILE,
         serverSelectionTimeoutMS=3000,
         connectTimeoutMS=3000,
         socketTimeoutMS=5000,
+        **_pool_options(),
     )
-    sync_client = MongoClient(
-        settings.mongo_url,
-        serverSelectionTimeoutMS=3000,
-        connectTimeoutMS=3000,
-        socketTimeoutMS=5000,
+
+
+async def warm_pool():
+    """Open min_pool_size connections up front so the first requests skip the handshake."""
+    db = get_db()
+    await asyncio.gather(
+        *(db.command("ping") for _ in range(settings.mongo_min_pool_size)),
+        return_exceptions=True,
     )
 
 
 async def close():
-    global client, sync_client
+    global client, _sync_client
     if client:
         client.close()
-    if sync_client:
-        sync_client.close()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
 
 
 async def ensure_indexes():
     db = get_db()
 
-    await db.service_types.create_index("slug", unique=True)
-
-    await db.providers.create_index([("location", GEOSPHERE)])
-
-    await db.observations.create_index([("location", GEOSPHERE)])
-    await db.observations.create_index([("category", 1), ("service_type", 1)])
-
-    await db.stripe_customers.create_index("email", unique=True)
-    await db.stripe_customers.create_index("stripe_customer_id", unique=True)
-
-    await db.bookings.create_index("stripe_payment_intent_id", unique=True)
-    await db.bookings.create_index("stripe_card_id", unique=True)
-    await db.bookings.create_index("customer_id")
-
-    await db.inquiries.create_index([("provider_id", 1), ("service_type", 1)])
-    await db.inquiries.create_index("status")
-    await db.inquiries.create_index("message_id", unique=True)
+    results = await asyncio.gather(
+        db.service_types.create_index("slug", unique=True),
+        db.providers.create_index([("location", GEOSPHERE)]),
+        db.providers.create_index("category"),
+        db.observations.create_index(
+            [("category", 1), ("service_type", 1), ("location", GEOSPHERE)]
+        ),
+        db.stripe_customers.create_index("email", unique=True),
+        db.stripe_customers.create_index("stripe_customer_id", unique=True),
+        db.bookings.create_index("stripe_payment_intent_id", unique=True),
+        db.bookings.create_index("stripe_card_id", unique=True),
+        db.bookings.create_index("customer_id"),
+        db.inquiries.create_index([("provider_id", 1), ("service_type", 1)]),
+        db.inquiries.create_index("status"),
+        db.inquiries.create_index("message_id", unique=True),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Index creation failed", exc_info=result)
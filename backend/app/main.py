@@ -1,11 +1,17 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import db
+from app.config import settings
 from app.routers import observations, providers, service_types, search, book, chat, inquiries
+from app.services.email_service import close_http_client, is_email_configured, poll_replies, smtp_pool
+from app.services.llm import close_openai_client
+from app.services.scraper import close_scrape_client
+from app.services.serpapi_service import close_http_client as close_serpapi_client
 
 logging.basicConfig(level=logging.INFO)
 
@@ -13,8 +19,21 @@ logging.basicConfig(level=logging.INFO)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db.connect()
+    await db.warm_pool()
     await db.ensure_indexes()
+    reply_task = None
+    if is_email_configured() and settings.imap_host:
+        reply_task = asyncio.create_task(poll_replies(settings.reply_check_interval_seconds))
     yield
+    if reply_task is not None:
+        reply_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await reply_task
+    await close_openai_client()
+    await smtp_pool.close()
+    await close_http_client()
+    await close_scrape_client()
+    await close_serpapi_client()
     await db.close()
 
 
@@ -26,10 +45,10 @@ app = FastAPI(
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[o.strip() for o in settings.cors_origins.split(",") if o.strip()],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["authorization", "content-type"],
 )
 
 app.include_router(service_types.router)
@@ -28,8 +28,3 @@ class InquiryResponse(BaseModel):
 
     model_config = {"populate_by_name": True}
 
-
-def doc_to_inquiry(doc: dict) -> dict:
-    doc["_id"] = str(doc["_id"])
-    doc["provider_id"] = str(doc["provider_id"])
-    return doc
@@ -5,10 +5,8 @@ from pydantic import BaseModel, Field
 
 class GeoJSONPoint(BaseModel):
     type: str = "Point"
-    coordinates: list[float] = Field(
+    coordinates: tuple[float, float] = Field(
         ...,
-        min_length=2,
-        max_length=2,
         description="[longitude, latitude]",
         examples=[[- 0.1276, 51.5074]],
     )
@@ -48,8 +46,8 @@ class ProviderResponse(BaseModel):
 
 def provider_to_doc(p: ProviderCreate) -> dict:
     return {
-        **p.model_dump(),
-        "location": p.location.model_dump(),
+        **p.model_dump(exclude={"location"}),
+        "location": {"type": "Point", "coordinates": list(p.location.coordinates)},
         "created_at": datetime.now(timezone.utc),
     }
 
@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from bson import ObjectId
+from pydantic import BaseModel, Field, PrivateAttr
 
 from app.models.provider import GeoJSONPoint
 
@@ -37,6 +38,15 @@ class ProviderWithPrices(BaseModel):
     observations: list[ObservationSummary] = []
     inquiry_status: Literal["none", "sent", "replied"] | None = "none"
 
+    _oid: ObjectId | None = PrivateAttr(default=None)
+
+    @property
+    def oid(self) -> ObjectId:
+        """The provider's ObjectId, kept from the source document when available."""
+        if self._oid is None:
+            self._oid = ObjectId(self.id)
+        return self._oid
+
 
 class PriceStats(BaseModel):
     avg_price: float
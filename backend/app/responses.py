@@ -0,0 +1,44 @@
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_json_array(
+    cursor,
+    transform: Optional[Callable[[dict], dict]] = None,
+) -> StreamingResponse:
+    """Stream a Motor cursor to the client as a JSON array, one document at a time.
+
+    Cursors whose pipeline already emits JSON-ready documents (string ids)
+    can omit ``transform``. The first document is fetched and encoded before
+    the response starts, so query and encoding errors on it still surface as
+    a 500 rather than a truncated 200.
+    """
+
+    def encode(doc: dict) -> bytes:
+        return orjson.dumps(transform(doc) if transform is not None else doc)
+
+    try:
+        first = encode(await cursor.__anext__())
+    except StopAsyncIteration:
+        first = None
+
+    async def gen() -> AsyncIterator[bytes]:
+        if first is None:
+            yield b"[]"
+            return
+        yield b"[" + first
+        try:
+            async for doc in cursor:
+                yield b"," + encode(doc)
+        except Exception:
+            # Headers are already sent; abort the body instead of closing the array.
+            logger.exception("Streaming JSON array failed mid-response")
+            raise
+        yield b"]"
+
+    return StreamingResponse(gen(), media_type="application/json")
@@ -0,0 +1,4 @@
+import re
+
+# Precompiled 24-hex-digit check, cheaper than ObjectId.is_valid on hot paths.
+is_object_id = re.compile(r"[0-9a-fA-F]{24}").fullmatch
@@ -1,4 +1,5 @@
 import logging
+from urllib.parse import quote_plus
 
 from fastapi import APIRouter
 from pydantic import BaseModel
@@ -7,6 +8,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api")
 
+_STRIP_PHONE = str.maketrans("", "", "+ ")
+_WA_TMPL = "https://wa.me/{phone}?text={text}"
+
 
 class BookingRequest(BaseModel):
     firstname: str
@@ -47,7 +51,10 @@ async def book(req: BookingRequest):
                 "available": bool(req.provider_phone),
                 "phone": req.provider_phone,
                 "message": whatsapp_message,
-                "link": f"https://wa.me/{req.provider_phone.replace('+', '').replace(' ', '')}?text={whatsapp_message}" if req.provider_phone else None
+                "link": _WA_TMPL.format(
+                    phone=req.provider_phone.translate(_STRIP_PHONE),
+                    text=quote_plus(whatsapp_message),
+                ) if req.provider_phone else None
             },
             "phone": {
                 "available": bool(req.provider_phone),
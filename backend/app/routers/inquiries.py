@@ -1,11 +1,12 @@
 import logging
 
 from bson import ObjectId
-from bson.errors import InvalidId
 from fastapi import APIRouter, HTTPException
 
 from app.db import get_db
-from app.models.inquiry import InquiryCreate, InquiryResponse, doc_to_inquiry
+from app.models.inquiry import InquiryCreate, InquiryResponse
+from app.responses import stream_json_array
+from app.routers._validation import is_object_id
 from app.services.email_service import check_for_replies, is_email_configured, send_inquiry
 
 logger = logging.getLogger(__name__)
@@ -21,9 +22,7 @@ async def create_inquiry(body: InquiryCreate):
             detail="Email sending is not configured. Set SMTP_HOST, SMTP_USER, SMTP_PASSWORD, and FROM_EMAIL.",
         )
 
-    try:
-        ObjectId(body.provider_id)
-    except InvalidId:
+    if not is_object_id(body.provider_id):
         raise HTTPException(status_code=400, detail="Invalid provider_id")
 
     try:
@@ -46,13 +45,19 @@ async def check_replies():
 
 @router.get("/{provider_id}")
 async def get_provider_inquiries(provider_id: str):
-    try:
-        oid = ObjectId(provider_id)
-    except InvalidId:
+    if not is_object_id(provider_id):
         raise HTTPException(status_code=400, detail="Invalid provider_id")
+    oid = ObjectId(provider_id)
 
     db = get_db()
-    docs = []
-    async for doc in db.inquiries.find({"provider_id": oid}).sort("created_at", -1):
-        docs.append(doc_to_inquiry(doc))
-    return docs
+    pipeline = [
+        {"$match": {"provider_id": oid}},
+        {"$sort": {"created_at": -1}},
+        {
+            "$addFields": {
+                "_id": {"$toString": "$_id"},
+                "provider_id": {"$toString": "$provider_id"},
+            }
+        },
+    ]
+    return await stream_json_array(db.inquiries.aggregate(pipeline))
@@ -1,8 +1,8 @@
+import asyncio
 from datetime import datetime, timezone
 from typing import Optional
 
 from bson import ObjectId
-from bson.errors import InvalidId
 from fastapi import APIRouter, HTTPException, Query
 
 from app.db import get_db
@@ -11,24 +11,40 @@ from app.models.observation import (
     ObservationResponse,
     doc_to_observation,
 )
+from app.responses import stream_json_array
+from app.routers._validation import is_object_id
 
 router = APIRouter(prefix="/api/observations", tags=["observations"])
 
+_EARTH_RADIUS_M = 6_378_137.0
+
+_OBSERVATION_PROJECTION = {
+    "provider_id": 1,
+    "service_type": 1,
+    "category": 1,
+    "price": 1,
+    "currency": 1,
+    "source_type": 1,
+    "location": 1,
+    "observed_at": 1,
+    "created_at": 1,
+}
+
 
 @router.post("", response_model=ObservationResponse, status_code=201)
 async def create_observation(body: ObservationCreate):
     db = get_db()
 
-    try:
-        provider_oid = ObjectId(body.provider_id)
-    except InvalidId:
+    if not is_object_id(body.provider_id):
         raise HTTPException(status_code=400, detail="Invalid provider_id")
+    provider_oid = ObjectId(body.provider_id)
 
-    provider = await db.providers.find_one({"_id": provider_oid})
+    provider, stype = await asyncio.gather(
+        db.providers.find_one({"_id": provider_oid}, {"location": 1}),
+        db.service_types.find_one({"slug": body.service_type}, {"slug": 1, "category": 1}),
+    )
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
-
-    stype = await db.service_types.find_one({"slug": body.service_type})
     if not stype:
         raise HTTPException(status_code=404, detail=f"Service type '{body.service_type}' not found")
 
@@ -49,7 +65,7 @@ async def create_observation(body: ObservationCreate):
     return doc_to_observation(doc)
 
 
-@router.get("", response_model=list[ObservationResponse])
+@router.get("", response_model=None)
 async def query_observations(
     category: str = Query(..., description="e.g. mechanic, electrician"),
     lat: float = Query(..., description="Latitude"),
@@ -62,15 +78,23 @@ async def query_observations(
     query: dict = {
         "category": category,
         "location": {
-            "$nearSphere": {
-                "$geometry": {"type": "Point", "coordinates": [lng, lat]},
-                "$maxDistance": radius_meters,
+            "$geoWithin": {
+                "$centerSphere": [[lng, lat], radius_meters / _EARTH_RADIUS_M],
             }
         },
     }
     if service_type:
         query["service_type"] = service_type
 
-    cursor = db.observations.find(query)
-    docs = await cursor.to_list(length=1000)
-    return [doc_to_observation(d) for d in docs]
+    pipeline = [
+        {"$match": query},
+        {"$limit": 1000},
+        {
+            "$project": {
+                **_OBSERVATION_PROJECTION,
+                "_id": {"$toString": "$_id"},
+                "provider_id": {"$toString": "$provider_id"},
+            }
+        },
+    ]
+    return await stream_json_array(db.observations.aggregate(pipeline))
@@ -1,7 +1,6 @@
 from typing import Optional
 
 from bson import ObjectId
-from bson.errors import InvalidId
 from fastapi import APIRouter, HTTPException, Query
 
 from app.db import get_db
@@ -11,9 +10,26 @@ from app.models.provider import (
     doc_to_provider,
     provider_to_doc,
 )
+from app.responses import stream_json_array
+from app.routers._validation import is_object_id
 
 router = APIRouter(prefix="/api/providers", tags=["providers"])
 
+_PROVIDER_PROJECTION = {
+    "name": 1,
+    "category": 1,
+    "location": 1,
+    "address": 1,
+    "city": 1,
+    "phone": 1,
+    "email": 1,
+    "website": 1,
+    "rating": 1,
+    "review_count": 1,
+    "description": 1,
+    "created_at": 1,
+}
+
 
 @router.post("", response_model=ProviderResponse, status_code=201)
 async def create_provider(body: ProviderCreate):
@@ -24,24 +40,26 @@ async def create_provider(body: ProviderCreate):
     return doc_to_provider(doc)
 
 
-@router.get("", response_model=list[ProviderResponse])
+@router.get("", response_model=None)
 async def list_providers(category: Optional[str] = Query(default=None)):
     db = get_db()
     query = {}
     if category:
         query["category"] = category
-    cursor = db.providers.find(query)
-    docs = await cursor.to_list(length=500)
-    return [doc_to_provider(d) for d in docs]
+    pipeline = [
+        {"$match": query},
+        {"$limit": 500},
+        {"$project": {**_PROVIDER_PROJECTION, "_id": {"$toString": "$_id"}}},
+    ]
+    return await stream_json_array(db.providers.aggregate(pipeline, batchSize=200))
 
 
 @router.get("/{provider_id}", response_model=ProviderResponse)
 async def get_provider(provider_id: str):
     db = get_db()
-    try:
-        oid = ObjectId(provider_id)
-    except InvalidId:
+    if not is_object_id(provider_id):
         raise HTTPException(status_code=400, detail="Invalid provider ID")
+    oid = ObjectId(provider_id)
 
     doc = await db.providers.find_one({"_id": oid})
     if not doc:
@@ -1,8 +1,7 @@
-import asyncio
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 
 from app.db import get_db
 from app.models.service_type import (
@@ -11,45 +10,56 @@ from app.models.service_type import (
     doc_to_service_type,
     service_type_to_doc,
 )
+from app.responses import stream_json_array
 from app.services import embeddings as embeddings_svc
+from app.services.chat import invalidate_service_types_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/service-types", tags=["service-types"])
 
+# Mirrors ServiceTypeResponse, with description kept as null when unset.
+_SERVICE_TYPE_PROJECTION = {
+    "_id": {"$toString": "$_id"},
+    "slug": 1,
+    "name": 1,
+    "category": 1,
+    "description": {"$ifNull": ["$description", None]},
+    "created_at": 1,
+}
+
 
 @router.post("", response_model=ServiceTypeResponse, status_code=201)
-async def create_service_type(body: ServiceTypeCreate):
+async def create_service_type(body: ServiceTypeCreate, background: BackgroundTasks):
     db = get_db()
     doc = service_type_to_doc(body)
 
-    existing = await db.service_types.find_one({"slug": doc["slug"]})
-    if existing:
+    result = await db.service_types.update_one(
+        {"slug": doc["slug"]}, {"$setOnInsert": doc}, upsert=True
+    )
+    if result.upserted_id is None:
         raise HTTPException(status_code=409, detail=f"Service type '{doc['slug']}' already exists")
+    doc["_id"] = result.upserted_id
+    invalidate_service_types_cache()
 
     if embeddings_svc.is_available():
-        try:
-            text = embeddings_svc.build_search_text(
-                body.name, body.category, body.description
-            )
-            vectors = await asyncio.to_thread(
-                embeddings_svc.get_embeddings().embed_documents, [text]
-            )
-            doc["embedding"] = vectors[0]
-        except Exception:
-            logger.warning("Failed to generate embedding for %s", body.slug, exc_info=True)
-
-    result = await db.service_types.insert_one(doc)
-    doc["_id"] = result.inserted_id
+        text = embeddings_svc.build_search_text(
+            body.name, body.category, body.description
+        )
+        background.add_task(embeddings_svc.store_service_type_embedding, result.upserted_id, body.slug, text)
+
     return doc_to_service_type(doc)
 
 
-@router.get("", response_model=list[ServiceTypeResponse])
+@router.get("", response_model=None)
 async def list_service_types(category: Optional[str] = Query(default=None)):
     db = get_db()
     query = {}
     if category:
         query["category"] = category
-    cursor = db.service_types.find(query)
-    docs = await cursor.to_list(length=500)
-    return [doc_to_service_type(d) for d in docs]
+    pipeline = [
+        {"$match": query},
+        {"$limit": 500},
+        {"$project": _SERVICE_TYPE_PROJECTION},
+    ]
+    return await stream_json_array(db.service_types.aggregate(pipeline))
@@ -1,22 +1,22 @@
+import asyncio
 import json
 import logging
-import re
-
-from openai import AsyncOpenAI
+import time
 
 from app.config import settings
 from app.db import get_db
 from app.models.chat import ChatMessage, ChatResponse
+from app.services.llm import get_openai_client
 
 logger = logging.getLogger(__name__)
 
-_SYSTEM_PROMPT = """\
+
+# Kept byte-identical across requests so OpenAI's automatic prefix cache can hit;
+# the per-request service type listing goes in a trailing system message.
+_SYSTEM_PROMPT_STATIC = """\
 You are a concise assistant for a local services price comparison platform. \
 Your job is to collect ALL required details before allowing a search.
 
-## Available service categories
-{service_types}
-
 ## Checklists — every item must be filled before status can be "ready"
 
 DEVICE REPAIRS (phone, tablet, laptop, console, etc.)
@@ -49,43 +49,72 @@ Combine ALL collected info from the entire conversation into one clean phrase. \
 NEVER use pronouns (it/this/that). NEVER use only the last message.
 
 ## Response format — raw JSON only, no markdown fences:
-{{
-  "collected": {{"service_type": "...", "brand": "...", "model": "..."}},
+{
+  "collected": {"service_type": "...", "brand": "...", "model": "..."},
   "missing": ["brand", "model"],
   "status": "clarifying",
   "message": "your single question with options"
-}}
+}
 
 When nothing is missing:
-{{
-  "collected": {{"service_type": "screen repair", "brand": "Apple", "model": "iPhone 15"}},
+{
+  "collected": {"service_type": "screen repair", "brand": "Apple", "model": "iPhone 15"},
   "missing": [],
   "status": "ready",
   "message": "2–4 word confirmation",
   "search_query": "iPhone 15 screen repair"
-}}
+}
 
 The "missing" array must list every checklist item not yet known. \
 "status" MUST be "clarifying" whenever "missing" is non-empty.
 """
 
+_SYSTEM_PROMPT_DYNAMIC = "## Available service categories\n{service_types}\n"
 
-async def _get_service_types_summary() -> str:
-    """Fetch service types from DB for the system prompt context."""
-    db = get_db()
-    categories: dict[str, list[str]] = {}
-    async for doc in db.service_types.find({}, {"name": 1, "category": 1}).limit(100):
-        cat = doc.get("category", "other")
-        categories.setdefault(cat, []).append(doc["name"])
 
-    if not categories:
-        return "No service types defined yet — use your best judgement."
+_SUMMARY_TTL = 60  # seconds
+_summary_cache: tuple[float, str] | None = None
+_summary_lock = asyncio.Lock()
+
 
-    lines = []
-    for cat, names in categories.items():
-        label = cat.replace("_", " ").title()
-        lines.append(f"- {label}: {', '.join(names)}")
-    return "\n".join(lines)
+def invalidate_service_types_cache() -> None:
+    """Drop the cached summary so the next chat turn sees newly added service types."""
+    global _summary_cache
+    _summary_cache = None
+
+
+async def _get_service_types_summary() -> str:
+    """Fetch service types from DB for the system prompt context.
+
+    The rendered summary is cached for _SUMMARY_TTL seconds.
+    """
+    global _summary_cache
+    cached = _summary_cache
+    if cached and time.monotonic() - cached[0] < _SUMMARY_TTL:
+        return cached[1]
+
+    async with _summary_lock:
+        cached = _summary_cache
+        if cached and time.monotonic() - cached[0] < _SUMMARY_TTL:
+            return cached[1]
+
+        db = get_db()
+        categories: dict[str, list[str]] = {}
+        async for doc in db.service_types.find({}, {"name": 1, "category": 1}).limit(100):
+            cat = doc.get("category", "other")
+            categories.setdefault(cat, []).append(doc["name"])
+
+        if not categories:
+            summary = "No service types defined yet — use your best judgement."
+        else:
+            lines = []
+            for cat, names in categories.items():
+                label = cat.replace("_", " ").title()
+                lines.append(f"- {label}: {', '.join(names)}")
+            summary = "\n".join(lines)
+
+        _summary_cache = (time.monotonic(), summary)
+        return summary
 
 
 def _validate_response(parsed: dict) -> dict:
@@ -118,14 +147,16 @@ async def chat(messages: list[ChatMessage]) -> ChatResponse:
         )
 
     service_summary = await _get_service_types_summary()
-    system_prompt = _SYSTEM_PROMPT.format(service_types=service_summary)
 
-    openai_messages: list[dict] = [{"role": "system", "content": system_prompt}]
+    openai_messages: list[dict] = [
+        {"role": "system", "content": _SYSTEM_PROMPT_STATIC},
+        {"role": "system", "content": _SYSTEM_PROMPT_DYNAMIC.format(service_types=service_summary)},
+    ]
     for m in messages:
         openai_messages.append({"role": m.role, "content": m.content})
 
     try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        client = get_openai_client()
         resp = await client.chat.completions.create(
             model="gpt-4o-mini",
             temperature=0,
@@ -133,16 +164,8 @@ async def chat(messages: list[ChatMessage]) -> ChatResponse:
             response_format={"type": "json_object"},
             messages=openai_messages,
         )
-        content = (resp.choices[0].message.content or "").strip()
-        logger.debug("LLM raw content: %r", content)
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
-
-        json_match = re.search(r"\{.*\}", content, re.DOTALL)
-        if not json_match:
-            raise ValueError(f"No JSON object found in LLM response: {content!r}")
-
-        parsed = json.loads(json_match.group())
+        # json_object mode guarantees a bare JSON object; anything else falls through to the fallback
+        parsed = json.loads(resp.choices[0].message.content or "")
         logger.info("LLM raw response: %s", parsed)
 
         parsed = _validate_response(parsed)
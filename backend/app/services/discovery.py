@@ -2,28 +2,39 @@ import asyncio
 import logging
 import math
 import re
+from collections import OrderedDict
 from datetime import datetime, timezone
 
+import numpy as np
 from bson import ObjectId
-from openai import AsyncOpenAI
+from pymongo import UpdateOne
 
 from app.config import settings
 from app.db import get_db
 from app.services import embeddings as embeddings_svc
+from app.services.chat import invalidate_service_types_cache
+from app.services.llm import get_openai_client
 from app.services.serpapi_service import search_maps
 
 logger = logging.getLogger(__name__)
 
 _EARTH_RADIUS_M = 6_371_000
+_WHITESPACE_RE = re.compile(r"\s+")
 
+# Strong references to fire-and-forget embedding tasks; the loop only keeps weak ones.
+_embedding_tasks: set[asyncio.Task] = set()
 
-def _haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """Great-circle distance in metres between two (lat, lng) points."""
-    rlat1, rlng1, rlat2, rlng2 = (math.radians(v) for v in (lat1, lng1, lat2, lng2))
-    dlat = rlat2 - rlat1
-    dlng = rlng2 - rlng1
-    a = math.sin(dlat / 2) ** 2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlng / 2) ** 2
-    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+def _within_radius(businesses: list[dict], lat: float, lng: float, radius_meters: float) -> list[dict]:
+    """Vectorised haversine filter — keeps businesses within radius_meters of (lat, lng)."""
+    if not businesses:
+        return []
+    lats = np.radians(np.fromiter((b["latitude"] for b in businesses), float, len(businesses)))
+    lngs = np.radians(np.fromiter((b["longitude"] for b in businesses), float, len(businesses)))
+    rlat, rlng = math.radians(lat), math.radians(lng)
+    a = np.sin((lats - rlat) / 2) ** 2 + math.cos(rlat) * np.cos(lats) * np.sin((lngs - rlng) / 2) ** 2
+    dist = 2 * _EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+    return [b for b, keep in zip(businesses, dist <= radius_meters) if keep]
 
 
 _CONDENSE_PROMPT = (
@@ -40,16 +51,31 @@ _CONDENSE_PROMPT = (
 )
 
 
+_CONDENSE_CACHE_MAX = 2048
+_condense_cache: OrderedDict[str, str] = OrderedDict()
+
+
+def _condense_cache_key(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", query.strip().lower())
+
+
 async def condense_query(query: str) -> str:
     """Use the LLM to turn a verbose user query into a short service-type name.
 
+    Results are cached in-process by normalised query.
     Falls back to the raw query (title-cased) when OpenAI is unavailable.
     """
     if not settings.openai_api_key:
         return query.strip().title()
 
+    key = _condense_cache_key(query)
+    cached = _condense_cache.get(key)
+    if cached is not None:
+        _condense_cache.move_to_end(key)
+        return cached
+
     try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        client = get_openai_client()
         resp = await client.chat.completions.create(
             model="gpt-4o-mini",
             temperature=0,
@@ -62,6 +88,9 @@ async def condense_query(query: str) -> str:
         )
         name = resp.choices[0].message.content.strip().strip('"')
         logger.info("Condensed query %r -> %r", query, name)
+        _condense_cache[key] = name
+        if len(_condense_cache) > _CONDENSE_CACHE_MAX:
+            _condense_cache.popitem(last=False)
         return name
     except Exception:
         logger.warning("LLM condensation failed, using raw query", exc_info=True)
@@ -78,32 +107,31 @@ async def _ensure_service_type(name: str, slug: str) -> str:
     """Return the slug of an existing or newly created service type."""
     db = get_db()
 
-    existing = await db.service_types.find_one({"slug": slug})
-    if existing:
+    category = slug.split("_")[0] if "_" in slug else slug
+    description = f"Auto-discovered: {name}"
+    result = await db.service_types.update_one(
+        {"slug": slug},
+        {"$setOnInsert": {
+            "slug": slug,
+            "name": name,
+            "category": category,
+            "description": description,
+            "created_at": datetime.now(timezone.utc),
+        }},
+        upsert=True,
+    )
+    if result.upserted_id is None:
         logger.info("Service type '%s' already exists", slug)
         return slug
 
-    category = slug.split("_")[0] if "_" in slug else slug
-
-    doc = {
-        "slug": slug,
-        "name": name,
-        "category": category,
-        "description": f"Auto-discovered: {name}",
-        "created_at": datetime.now(timezone.utc),
-    }
-
+    invalidate_service_types_cache()
     if embeddings_svc.is_available():
-        try:
-            text = embeddings_svc.build_search_text(name, category, doc["description"])
-            vectors = await asyncio.to_thread(
-                embeddings_svc.get_embeddings().embed_documents, [text]
-            )
-            doc["embedding"] = vectors[0]
-        except Exception:
-            logger.warning("Failed to generate embedding for %s", slug, exc_info=True)
-
-    await db.service_types.insert_one(doc)
+        text = embeddings_svc.build_search_text(name, category, description)
+        task = asyncio.create_task(
+            embeddings_svc.store_service_type_embedding(result.upserted_id, slug, text)
+        )
+        _embedding_tasks.add(task)
+        task.add_done_callback(_embedding_tasks.discard)
     logger.info("Created service type '%s' (%s)", slug, name)
     return slug
 
@@ -149,12 +177,15 @@ async def discover_external(
     else:
         name = condensed_name or await condense_query(query)
         slug = name_to_slug(name)
-    await _ensure_service_type(name, slug)
-
-    try:
-        businesses = await search_maps(query, lat, lng, radius_meters)
-    except Exception:
-        logger.exception("SerpAPI search failed for query=%r", query)
+    ensured, businesses = await asyncio.gather(
+        _ensure_service_type(name, slug),
+        search_maps(query, lat, lng, radius_meters),
+        return_exceptions=True,
+    )
+    if isinstance(ensured, BaseException):
+        logger.warning("Failed to ensure service type '%s'", slug, exc_info=ensured)
+    if isinstance(businesses, BaseException):
+        logger.error("SerpAPI search failed for query=%r", query, exc_info=businesses)
         return []
 
     if not businesses:
@@ -162,10 +193,7 @@ async def discover_external(
         return []
 
     before_count = len(businesses)
-    businesses = [
-        b for b in businesses
-        if _haversine_m(lat, lng, b["latitude"], b["longitude"]) <= radius_meters
-    ]
+    businesses = _within_radius(businesses, lat, lng, radius_meters)
     logger.info(
         "SerpAPI returned %d businesses for query=%r (%d after radius filter)",
         before_count, query, len(businesses),
@@ -173,27 +201,31 @@ async def discover_external(
     if not businesses:
         return []
 
-    db = get_db()
-    provider_ids: list[ObjectId] = []
+    keys: list[dict] = []
+    ops: list[UpdateOne] = []
+    seen: set[tuple[str, str]] = set()
     for biz in businesses:
         if not biz.get("name"):
             continue
         doc = _business_to_provider_doc(biz, slug)
-        result = await db.providers.update_one(
-            {"name": doc["name"], "address": doc["address"]},
-            {"$setOnInsert": doc},
-            upsert=True,
-        )
-        pid = result.upserted_id
-        if pid is None:
-            existing = await db.providers.find_one(
-                {"name": doc["name"], "address": doc["address"]},
-                {"_id": 1},
-            )
-            if existing:
-                pid = existing["_id"]
-        if pid:
-            provider_ids.append(pid)
+        key = (doc["name"], doc["address"])
+        if key in seen:
+            continue
+        seen.add(key)
+        keys.append({"name": doc["name"], "address": doc["address"]})
+        ops.append(UpdateOne(keys[-1], {"$setOnInsert": doc}, upsert=True))
+    if not ops:
+        return []
+
+    db = get_db()
+    result = await db.providers.bulk_write(ops, ordered=False)
+    upserted = result.upserted_ids
+    provider_ids: list[ObjectId] = list(upserted.values())
+
+    matched = [k for i, k in enumerate(keys) if i not in upserted]
+    if matched:
+        async for existing in db.providers.find({"$or": matched}, {"_id": 1}):
+            provider_ids.append(existing["_id"])
 
     logger.info("Upserted up to %d providers for query=%r", len(provider_ids), query)
     return provider_ids
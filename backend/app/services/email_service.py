@@ -5,19 +5,21 @@ import json
 import logging
 import random
 import re
-import smtplib
 from datetime import datetime, timezone
 from email.mime.text import MIMEText
 from email.utils import formataddr, make_msgid
 from typing import Optional
 from urllib.parse import urlparse
 
+import aiosmtplib
 import httpx
 from bson import ObjectId
-from openai import AsyncOpenAI
+from pymongo import UpdateOne
 
 from app.config import settings
 from app.db import get_db
+from app.services.llm import get_openai_client
+from app.services.openai_batch import fetch_batch_results, submit_chat_batch
 
 logger = logging.getLogger(__name__)
 
@@ -41,11 +43,47 @@ def _extract_domain(website: str) -> Optional[str]:
 
 
 _EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}")
-_IGNORE_DOMAINS = {
+_IGNORE_DOMAINS = frozenset({
     "sentry.io", "wixpress.com", "googleapis.com", "google.com",
     "facebook.com", "twitter.com", "instagram.com", "schema.org",
     "w3.org", "example.com", "cloudflare.com",
-}
+})
+
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=_HTTPX_TIMEOUT,
+            follow_redirects=True,
+            headers={"User-Agent": "Mozilla/5.0 (compatible; PriceBot/1.0)"},
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _first_email(text: str, provider_domain: Optional[str]) -> Optional[str]:
+    """Pick an address on the provider's own domain if present, else the first usable one."""
+    candidates = [
+        (addr, domain)
+        for addr, domain in ((a, a.rsplit("@", 1)[1].lower()) for a in _EMAIL_RE.findall(text))
+        if domain not in _IGNORE_DOMAINS
+    ]
+    if provider_domain:
+        preferred = next((a for a, d in candidates if d == provider_domain), None)
+        if preferred:
+            return preferred
+    return candidates[0][0] if candidates else None
 
 
 async def _scrape_email_from_website(website: str) -> Optional[str]:
@@ -56,33 +94,31 @@ async def _scrape_email_from_website(website: str) -> Optional[str]:
         website = "https://" + website
 
     provider_domain = _extract_domain(website)
+    if provider_domain:
+        provider_domain = provider_domain.lower()
 
     try:
-        async with httpx.AsyncClient(
-            timeout=_HTTPX_TIMEOUT,
-            follow_redirects=True,
-            headers={"User-Agent": "Mozilla/5.0 (compatible; PriceBot/1.0)"},
-        ) as client:
-            pages_to_check = [website]
-            resp = await client.get(website)
-            text = resp.text.lower()
-            for suffix in ["/contact", "/kontakt", "/about", "/impressum"]:
-                if suffix in text:
-                    pages_to_check.append(website.rstrip("/") + suffix)
-
-            for page_url in pages_to_check[:3]:
-                try:
-                    r = await client.get(page_url)
-                    found = _EMAIL_RE.findall(r.text)
-                    for addr in found:
-                        addr_domain = addr.split("@")[1].lower()
-                        if addr_domain in _IGNORE_DOMAINS:
-                            continue
-                        if provider_domain and addr_domain == provider_domain:
-                            return addr
-                        return addr
-                except Exception:
-                    continue
+        client = _get_http_client()
+        resp = await client.get(website)
+        found = _first_email(resp.text, provider_domain)
+        if found:
+            return found
+
+        text = resp.text.lower()
+        sub_pages = [
+            website.rstrip("/") + suffix
+            for suffix in ["/contact", "/kontakt", "/about", "/impressum"]
+            if suffix in text
+        ][:2]
+        responses = await asyncio.gather(
+            *(client.get(u) for u in sub_pages), return_exceptions=True
+        )
+        for r in responses:
+            if isinstance(r, BaseException):
+                continue
+            found = _first_email(r.text, provider_domain)
+            if found:
+                return found
     except Exception:
         logger.debug("Failed to scrape email from %s", website, exc_info=True)
 
@@ -97,11 +133,11 @@ async def find_provider_email(provider: dict) -> Optional[str]:
     return OVERRIDE_RECIPIENT
 
 
-_FIRST_NAMES = [
+_FIRST_NAMES = (
     "James", "Emma", "Oliver", "Sophie", "Lucas", "Mia", "Ethan", "Chloe",
     "Noah", "Lily", "Leo", "Anna", "Max", "Clara", "Tom", "Alice",
     "Ben", "Sarah", "Daniel", "Laura", "Henry", "Emily", "Jack", "Hannah",
-]
+)
 
 _DRAFT_PROMPT = (
     "You are writing a brief, professional email on behalf of a potential customer "
@@ -118,17 +154,13 @@ _DRAFT_PROMPT = (
 )
 
 
-def _random_name() -> str:
-    return random.choice(_FIRST_NAMES)
-
-
 async def draft_inquiry_email(
     provider_name: str,
     service_name: str,
     provider_description: Optional[str] = None,
 ) -> tuple[str, str]:
     """Draft a personalized inquiry email. Returns (subject, body)."""
-    sender_name = _random_name()
+    sender_name = random.choice(_FIRST_NAMES)
 
     context = f"Provider: {provider_name}"
     if provider_description:
@@ -150,7 +182,7 @@ async def draft_inquiry_email(
         return subject, body
 
     try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        client = get_openai_client()
         resp = await client.chat.completions.create(
             model="gpt-4o-mini",
             temperature=0.7,
@@ -175,8 +207,58 @@ async def draft_inquiry_email(
         return subject, body
 
 
-def _send_email(to_addr: str, subject: str, body: str, message_id: str) -> None:
-    """Send an email via SMTP (blocking — run in a thread)."""
+class SmtpPool:
+    """A single long-lived SMTP session shared by all outgoing inquiries.
+
+    STARTTLS and LOGIN happen once per connection rather than once per email.
+    Sends are serialised on one session; a dropped connection is reopened and
+    the send retried once.
+    """
+
+    def __init__(self) -> None:
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.smtp_host,
+            port=settings.smtp_port,
+            username=settings.smtp_user,
+            password=settings.smtp_password,
+            start_tls=True,
+            timeout=15,
+        )
+        await smtp.connect()
+        return smtp
+
+    async def send(self, msg: MIMEText, to_addr: str) -> None:
+        async with self._lock:
+            for attempt in range(2):
+                if self._smtp is None or not self._smtp.is_connected:
+                    self._smtp = await self._connect()
+                try:
+                    await self._smtp.sendmail(settings.from_email, [to_addr], msg.as_string())
+                    return
+                except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError):
+                    self._smtp = None
+                    if attempt:
+                        raise
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._smtp is not None and self._smtp.is_connected:
+                try:
+                    await self._smtp.quit()
+                except aiosmtplib.SMTPException:
+                    self._smtp.close()
+            self._smtp = None
+
+
+smtp_pool = SmtpPool()
+
+
+async def _send_email(to_addr: str, subject: str, body: str, message_id: str) -> None:
+    """Send an email over the shared SMTP session."""
     msg = MIMEText(body, "plain", "utf-8")
     msg["From"] = formataddr(("Rate Right", settings.from_email))
     msg["To"] = to_addr
@@ -184,11 +266,7 @@ def _send_email(to_addr: str, subject: str, body: str, message_id: str) -> None:
     msg["Message-ID"] = message_id
     msg["Reply-To"] = settings.from_email
 
-    with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-        server.ehlo()
-        server.starttls()
-        server.login(settings.smtp_user, settings.smtp_password)
-        server.sendmail(settings.from_email, [to_addr], msg.as_string())
+    await smtp_pool.send(msg, to_addr)
 
 
 async def send_inquiry(provider_id: str, service_type_slug: str) -> dict:
@@ -224,7 +302,7 @@ async def send_inquiry(provider_id: str, service_type_slug: str) -> dict:
 
     message_id = make_msgid(domain=settings.from_email.split("@")[-1] if "@" in settings.from_email else "rateright.local")
 
-    await asyncio.to_thread(_send_email, email_to, subject, body, message_id)
+    await _send_email(email_to, subject, body, message_id)
 
     doc = {
         "provider_id": ObjectId(provider_id),
@@ -249,47 +327,155 @@ async def send_inquiry(provider_id: str, service_type_slug: str) -> dict:
 
 
 _PRICE_EXTRACT_PROMPT = (
-    "You are extracting pricing information from an email reply. "
-    "The email is a response to a price inquiry about a specific service.\n\n"
-    "Extract the price and currency if mentioned. If multiple prices are given, "
-    "use the lowest/base price.\n\n"
-    'Reply with ONLY a JSON object: {"price": <number or null>, "currency": "<3-letter code or null>"}\n'
-    "If no price is found, return null for both fields."
+    "You are extracting pricing information from email replies. "
+    "Each email is a response to a price inquiry about a specific service.\n\n"
+    "You receive a JSON list of replies, each with an id, the service asked about, "
+    "and the reply body. For each reply, extract the price and currency if mentioned. "
+    "If multiple prices are given, use the lowest/base price.\n\n"
+    'Reply with ONLY a JSON object: {"results": [{"id": <id>, "price": <number or null>, '
+    '"currency": "<3-letter code or null>"}, ...]}\n'
+    "Include every id. If no price is found, return null for both fields."
 )
+_PRICE_BATCH_SIZE = 20
+_PRICE_BATCH_BODY_CHARS = 2000
 
+_REPLY_PRICE_RE = re.compile(
+    r"(?P<cur>[₹€$£]|\b(?:INR|USD|EUR|GBP|Rs\.?))\s*"
+    r"(?P<amt>(?:\d{1,3}(?:,\d{2,3})*,\d{3}|\d+)(?:\.\d{1,2})?)(?!\d|[,.]\d)",
+    re.IGNORECASE,
+)
+_REPLY_CURRENCY = {
+    "₹": "INR", "inr": "INR", "rs": "INR", "rs.": "INR",
+    "$": "USD", "usd": "USD",
+    "€": "EUR", "eur": "EUR",
+    "£": "GBP", "gbp": "GBP",
+}
 
-async def _extract_price_from_reply(reply_body: str, service_name: str) -> tuple[Optional[float], Optional[str]]:
-    """Use LLM to extract a price from an email reply."""
-    if not settings.openai_api_key:
-        return None, None
 
-    try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        resp = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0,
-            max_tokens=100,
-            messages=[
-                {"role": "system", "content": _PRICE_EXTRACT_PROMPT},
-                {"role": "user", "content": f"Service: {service_name}\n\nEmail reply:\n{reply_body}"},
-            ],
-        )
-        parsed = json.loads(resp.choices[0].message.content.strip())
-        price = parsed.get("price")
-        currency = parsed.get("currency", "INR")
+def _regex_price(reply_body: str) -> Optional[tuple[float, str]]:
+    """Price from a reply that quotes exactly one marked amount (e.g. '₹1,499'); None otherwise."""
+    found: set[tuple[float, str]] = set()
+    for m in _REPLY_PRICE_RE.finditer(reply_body):
+        amount = float(m.group("amt").replace(",", ""))
+        if amount > 0:
+            found.add((amount, _REPLY_CURRENCY[m.group("cur").lower()]))
+            if len(found) > 1:
+                return None
+    return found.pop() if found else None
+
+
+def _price_request(items: list[tuple[str, str, str]]) -> dict:
+    """Chat-completions request body asking for prices from a chunk of replies."""
+    payload = [
+        {"id": item_id, "service": service_name, "body": body[:_PRICE_BATCH_BODY_CHARS]}
+        for item_id, service_name, body in items
+    ]
+    return {
+        "model": "gpt-4o-mini",
+        "temperature": 0,
+        "max_tokens": 40 * len(items) + 20,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": _PRICE_EXTRACT_PROMPT},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+        ],
+    }
+
+
+def _parse_price_results(content: str) -> dict[str, tuple[Optional[float], Optional[str]]]:
+    parsed = json.loads(content)
+    out: dict[str, tuple[Optional[float], Optional[str]]] = {}
+    for entry in parsed.get("results", []):
+        if not isinstance(entry, dict):
+            continue
+        price = entry.get("price")
         if price and isinstance(price, (int, float)) and price > 0:
-            return float(price), currency
-        return None, None
+            out[str(entry.get("id"))] = (float(price), entry.get("currency") or "INR")
+    return out
+
+
+def _chunk_items(items: list[tuple[str, str, str]]) -> list[list[tuple[str, str, str]]]:
+    return [items[i:i + _PRICE_BATCH_SIZE] for i in range(0, len(items), _PRICE_BATCH_SIZE)]
+
+
+async def _extract_prices_chunk(
+    items: list[tuple[str, str, str]],
+) -> dict[str, tuple[Optional[float], Optional[str]]]:
+    try:
+        client = get_openai_client()
+        resp = await client.chat.completions.create(**_price_request(items))
+        return _parse_price_results(resp.choices[0].message.content)
+    except Exception:
+        logger.warning("Failed to extract prices from %d replies", len(items), exc_info=True)
+        return {}
+
+
+async def _extract_prices_batch(
+    items: list[tuple[str, str, str]],
+) -> dict[str, tuple[Optional[float], Optional[str]]]:
+    """Use one LLM call per chunk of replies to extract prices.
+
+    items are (id, service_name, reply_body); returns id -> (price, currency)
+    for replies where a price was found.
+    """
+    if not settings.openai_api_key or not items:
+        return {}
+
+    results: dict[str, tuple[Optional[float], Optional[str]]] = {}
+    for chunk_result in await asyncio.gather(*(_extract_prices_chunk(c) for c in _chunk_items(items))):
+        results.update(chunk_result)
+    return results
+
+
+async def _submit_price_batch(items: list[tuple[str, str, str]]) -> Optional[str]:
+    """Queue price extraction on the OpenAI Batch API. Returns the batch id, or None on failure."""
+    try:
+        return await submit_chat_batch([
+            (f"chunk-{n}", _price_request(chunk))
+            for n, chunk in enumerate(_chunk_items(items))
+        ])
     except Exception:
-        logger.warning("Failed to extract price from reply", exc_info=True)
-        return None, None
+        logger.warning("Failed to submit price extraction batch", exc_info=True)
+        return None
+
 
+_IMAP_SEARCH_CHUNK = 20
+
+
+def _imap_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _imap_reply_criteria(message_ids: list[str]) -> str:
+    """IMAP SEARCH key matching replies to any of message_ids via In-Reply-To or References."""
+    terms = [
+        f"(OR HEADER In-Reply-To {_imap_quote(mid)} HEADER References {_imap_quote(mid)})"
+        for mid in message_ids
+    ]
+    expr = terms[0]
+    for term in terms[1:]:
+        expr = f"(OR {expr} {term})"
+    return expr
+
+
+def _message_text(msg) -> str:
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_type() == "text/plain":
+                payload = part.get_payload(decode=True)
+                if payload:
+                    return payload.decode("utf-8", errors="replace")
+        return ""
+    payload = msg.get_payload(decode=True)
+    return payload.decode("utf-8", errors="replace") if payload else ""
 
-def _check_imap_replies(known_message_ids: set[str]) -> list[dict]:
+
+def _check_imap_replies(known_message_ids: set[str], id_pattern: re.Pattern) -> list[dict]:
     """Check IMAP inbox for replies to our inquiries (blocking — run in a thread).
 
-    Only fetches full bodies for messages whose In-Reply-To/References match
-    a known inquiry Message-ID, keeping things fast.
+    The server does the matching: one UID SEARCH per chunk of known Message-IDs
+    returns only unseen replies, which are then pulled in a single UID FETCH.
+    Each reply carries the ``matched_id`` that id_pattern found in its headers.
     """
     if not settings.imap_host or not settings.smtp_user or not known_message_ids:
         return []
@@ -301,64 +487,40 @@ def _check_imap_replies(known_message_ids: set[str]) -> list[dict]:
         conn.login(settings.smtp_user, settings.smtp_password)
         conn.select("INBOX")
 
-        _, msg_nums = conn.search(None, "UNSEEN")
-        if not msg_nums[0]:
+        mids = sorted(known_message_ids)
+        uids: set[bytes] = set()
+        for i in range(0, len(mids), _IMAP_SEARCH_CHUNK):
+            criteria = _imap_reply_criteria(mids[i:i + _IMAP_SEARCH_CHUNK])
+            _, data = conn.uid("SEARCH", None, "UNSEEN", criteria)
+            if data and data[0]:
+                uids.update(data[0].split())
+
+        if not uids:
             conn.logout()
             return []
 
-        nums = msg_nums[0].split()
+        uid_set = b",".join(sorted(uids, key=int)).decode()
+        _, fetch_data = conn.uid("FETCH", uid_set, "(BODY.PEEK[])")
 
-        # Batch-fetch just headers to quickly identify relevant replies
-        num_range = b",".join(nums)
-        _, header_data = conn.fetch(num_range, "(BODY.PEEK[HEADER.FIELDS (In-Reply-To References From Subject)])")
-
-        relevant_nums = []
-        for i in range(0, len(header_data), 2):
-            item = header_data[i]
+        for item in fetch_data:
             if not isinstance(item, tuple) or len(item) < 2:
                 continue
-            seq_str = item[0].split()[0]
-            hdr = email_lib.message_from_bytes(item[1])
-            in_reply_to = (hdr.get("In-Reply-To") or "").strip()
-            references = (hdr.get("References") or "").strip()
-
-            matched = False
-            for mid in known_message_ids:
-                if mid in in_reply_to or mid in references:
-                    matched = True
-                    break
-            if matched:
-                relevant_nums.append((seq_str, in_reply_to, references, hdr.get("From", ""), hdr.get("Subject", "")))
-
-        for seq, in_reply_to, references, from_addr, subject in relevant_nums:
-            _, body_data = conn.fetch(seq, "(RFC822)")
-            raw = body_data[0][1]
-            msg = email_lib.message_from_bytes(raw)
-
-            body = ""
-            if msg.is_multipart():
-                for part in msg.walk():
-                    if part.get_content_type() == "text/plain":
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            body = payload.decode("utf-8", errors="replace")
-                            break
-            else:
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    body = payload.decode("utf-8", errors="replace")
-
-            # Mark as seen
-            conn.store(seq, "+FLAGS", "\\Seen")
-
+            msg = email_lib.message_from_bytes(item[1])
+            in_reply_to = (msg.get("In-Reply-To") or "").strip()
+            references = (msg.get("References") or "").strip()
+            m = id_pattern.search(in_reply_to) or id_pattern.search(references)
+            if not m:
+                continue
             replies.append({
+                "matched_id": m.group(),
                 "in_reply_to": in_reply_to,
                 "references": references,
-                "from_addr": from_addr,
-                "subject": subject,
-                "body": body,
+                "from_addr": msg.get("From", ""),
+                "subject": msg.get("Subject", ""),
+                "body": _message_text(msg),
             })
 
+        conn.uid("STORE", uid_set, "+FLAGS", "(\\Seen)")
         conn.logout()
     except Exception:
         logger.warning("IMAP reply check failed", exc_info=True)
@@ -376,89 +538,196 @@ async def check_for_replies() -> int:
 
     db = get_db()
 
-    pending_inquiries = []
-    async for inq in db.inquiries.find({"status": "sent"}):
-        pending_inquiries.append(inq)
+    if settings.openai_batch_extraction:
+        await _finalize_batched_prices()
 
-    if not pending_inquiries:
+    cursor = db.inquiries.find(
+        {"status": "sent"},
+        {"message_id": 1, "service_type": 1, "provider_id": 1, "provider_name": 1, "email_to": 1},
+    )
+    msg_id_map = {inq["message_id"]: inq async for inq in cursor}
+    if not msg_id_map:
         return 0
 
-    msg_id_map = {inq["message_id"]: inq for inq in pending_inquiries}
-
-    replies = await asyncio.to_thread(_check_imap_replies, set(msg_id_map.keys()))
+    id_pattern = re.compile("|".join(map(re.escape, msg_id_map)))
+    replies = await asyncio.to_thread(_check_imap_replies, set(msg_id_map), id_pattern)
     if not replies:
         return 0
 
-    processed = 0
-    for reply in replies:
-        inquiry = None
-        for ref in [reply["in_reply_to"], reply.get("references", "")]:
-            if ref in msg_id_map:
-                inquiry = msg_id_map[ref]
-                break
-            for mid, inq in msg_id_map.items():
-                if mid in ref:
-                    inquiry = inq
-                    break
-            if inquiry:
-                break
-
-        if not inquiry:
-            continue
+    matched = [(reply, msg_id_map[reply["matched_id"]]) for reply in replies]
+    stype_docs, providers = await _load_reply_context([inq for _, inq in matched])
+
+    entries = [(str(idx), reply["body"], inquiry) for idx, (reply, inquiry) in enumerate(matched)]
+    prices: dict[str, tuple[Optional[float], Optional[str]]] = {}
+    unpriced: list[tuple[str, str, dict]] = []
+    for entry in entries:
+        hit = _regex_price(entry[1])
+        if hit:
+            prices[entry[0]] = hit
+        else:
+            unpriced.append(entry)
+
+    if unpriced and settings.openai_batch_extraction and settings.openai_api_key:
+        batch_id = await _submit_price_batch([
+            (str(inquiry["_id"]), _stype_name(stype_docs, inquiry), body)
+            for _, body, inquiry in unpriced
+        ])
+        if batch_id:
+            now = datetime.now(timezone.utc)
+            await db.inquiries.bulk_write([
+                UpdateOne({"_id": inquiry["_id"]}, {"$set": {
+                    "status": "replied",
+                    "reply_body": body[:5000],
+                    "replied_at": now,
+                    "price_batch_id": batch_id,
+                }})
+                for _, body, inquiry in unpriced
+            ], ordered=False)
+            logger.info("Queued %d email replies for batch price extraction", len(unpriced))
+            queued = {entry_id for entry_id, _, _ in unpriced}
+            entries = [e for e in entries if e[0] not in queued]
+            unpriced = []
+
+    if unpriced:
+        prices.update(await _extract_prices_batch([
+            (entry_id, _stype_name(stype_docs, inquiry), body) for entry_id, body, inquiry in unpriced
+        ]))
+    if entries:
+        await _store_reply_results(entries, prices, stype_docs, providers)
+    processed = len(matched)
+
+    logger.info("Processed %d email replies", processed)
+    return processed
+
+
+async def poll_replies(interval: float) -> None:
+    """Process inbox replies every interval seconds until cancelled."""
+    while True:
+        try:
+            await check_for_replies()
+        except Exception:
+            logger.warning("Background reply check failed", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+async def _load_reply_context(inquiries: list[dict]) -> tuple[dict[str, dict], dict]:
+    """Fetch the service types and provider locations referenced by a set of inquiries."""
+    db = get_db()
+    slugs = list({inq["service_type"] for inq in inquiries})
+    provider_ids = list({inq["provider_id"] for inq in inquiries})
+    stype_cursor = db.service_types.find({"slug": {"$in": slugs}}, {"slug": 1, "name": 1, "category": 1})
+    provider_cursor = db.providers.find({"_id": {"$in": provider_ids}}, {"location": 1})
+    stype_list, provider_list = await asyncio.gather(
+        stype_cursor.to_list(length=None), provider_cursor.to_list(length=None)
+    )
+    stype_docs = {doc["slug"]: doc for doc in stype_list}
+    providers = {doc["_id"]: doc for doc in provider_list}
+    return stype_docs, providers
+
 
-        stype_doc = await db.service_types.find_one({"slug": inquiry["service_type"]})
-        service_name = stype_doc["name"] if stype_doc else inquiry["service_type"]
+def _stype_name(stype_docs: dict[str, dict], inquiry: dict) -> str:
+    stype_doc = stype_docs.get(inquiry["service_type"])
+    return stype_doc["name"] if stype_doc else inquiry["service_type"]
 
-        price, currency = await _extract_price_from_reply(reply["body"], service_name)
 
-        now = datetime.now(timezone.utc)
+async def _store_reply_results(
+    entries: list[tuple[str, str, dict]],
+    prices: dict[str, tuple[Optional[float], Optional[str]]],
+    stype_docs: dict[str, dict],
+    providers: dict,
+) -> None:
+    """Mark inquiries replied and record an observation for each (id, reply_body, inquiry) entry."""
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    inquiry_updates: list[UpdateOne] = []
+    observation_docs: list[dict] = []
+    for entry_id, body, inquiry in entries:
+        price, currency = prices.get(entry_id, (None, None))
+        stype_doc = stype_docs.get(inquiry["service_type"])
+        provider = providers.get(inquiry["provider_id"])
+
         update: dict = {
             "status": "replied",
-            "reply_body": reply["body"][:5000],
-            "replied_at": now,
+            "reply_body": body[:5000],
+            "replied_at": inquiry.get("replied_at") or now,
         }
         if price:
             update["extracted_price"] = price
             update["extracted_currency"] = currency
-
-        await db.inquiries.update_one(
-            {"_id": inquiry["_id"]},
-            {"$set": update},
+        inquiry_updates.append(
+            UpdateOne({"_id": inquiry["_id"]}, {"$set": update, "$unset": {"price_batch_id": ""}})
         )
 
-        provider = await db.providers.find_one({"_id": inquiry["provider_id"]})
-        source_url = f"mailto:{inquiry['email_to']}"
-
-        observation_doc = {
+        observation_docs.append({
             "provider_id": inquiry["provider_id"],
             "service_type": inquiry["service_type"],
             "category": stype_doc["category"] if stype_doc else inquiry["service_type"],
-            "price": price if price else 0,
+            "price": price if price and price > 0 else 0,
             "currency": currency if currency else "INR",
             "source_type": "quote",
-            "source_url": source_url,
+            "source_url": f"mailto:{inquiry['email_to']}",
             "location": provider["location"] if provider else {"type": "Point", "coordinates": [0, 0]},
             "observed_at": now,
             "created_at": now,
-            "inquiry_reply": reply["body"][:2000],
-        }
-
+            "inquiry_reply": body[:2000],
+        })
         if price and price > 0:
-            await db.observations.insert_one(observation_doc)
             logger.info(
                 "Created observation from email reply: provider=%s, price=%.2f %s",
                 inquiry["provider_name"], price, currency,
             )
         else:
-            observation_doc["price"] = 0
-            observation_doc["source_type"] = "quote"
-            await db.observations.insert_one(observation_doc)
             logger.info(
                 "Stored email reply as observation (no price extracted): provider=%s",
                 inquiry["provider_name"],
             )
 
-        processed += 1
+    await asyncio.gather(
+        db.inquiries.bulk_write(inquiry_updates, ordered=False),
+        db.observations.insert_many(observation_docs, ordered=False),
+    )
 
-    logger.info("Processed %d email replies", processed)
-    return processed
+
+async def _finalize_batched_prices() -> int:
+    """Turn finished price-extraction batches into observations.
+
+    Returns the number of inquiries finalised.
+    """
+    db = get_db()
+    by_batch: dict[str, list[dict]] = {}
+    async for inq in db.inquiries.find({"price_batch_id": {"$exists": True}}):
+        by_batch.setdefault(inq["price_batch_id"], []).append(inq)
+    if not by_batch:
+        return 0
+
+    finalised = 0
+    for batch_id, inquiries in by_batch.items():
+        try:
+            contents = await fetch_batch_results(batch_id)
+        except Exception:
+            logger.warning("Failed to poll OpenAI batch %s", batch_id, exc_info=True)
+            continue
+        if contents is None:
+            continue
+
+        stype_docs, providers = await _load_reply_context(inquiries)
+        entries = [(str(inq["_id"]), inq.get("reply_body") or "", inq) for inq in inquiries]
+
+        prices: dict[str, tuple[Optional[float], Optional[str]]] = {}
+        if not contents:
+            # Failed, expired or cancelled batch — extract synchronously instead.
+            prices = await _extract_prices_batch([
+                (entry_id, _stype_name(stype_docs, inq), body) for entry_id, body, inq in entries
+            ])
+        for content in contents.values():
+            try:
+                prices.update(_parse_price_results(content))
+            except Exception:
+                logger.warning("Unparseable result in OpenAI batch %s", batch_id, exc_info=True)
+
+        await _store_reply_results(entries, prices, stype_docs, providers)
+        finalised += len(entries)
+
+    if finalised:
+        logger.info("Finalised %d batched email replies", finalised)
+    return finalised
@@ -1,30 +1,104 @@
+import asyncio
+import functools
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from bson import ObjectId
+from bson.binary import Binary, BinaryVectorDtype
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
 from app.config import settings
+from app.db import get_db
+
+logger = logging.getLogger(__name__)
 
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIMENSIONS = 1536
-
-_embeddings: OpenAIEmbeddings | None = None
+_EMBEDDING_CACHE_MAX = 4096
+# Per-request limits for bulk embedding (OpenAI allows 2048 inputs / ~600k tokens).
+EMBEDDING_BATCH_SIZE = 512
+EMBEDDING_BATCH_TOKENS = 500_000
 
 
+@functools.cache
 def is_available() -> bool:
     """True when an OpenAI API key is configured."""
     return bool(settings.openai_api_key)
 
 
-def get_embeddings() -> OpenAIEmbeddings:
-    global _embeddings
-    if _embeddings is None:
-        if not is_available():
-            raise RuntimeError(
-                "OPENAI_API_KEY is not set — vector search is unavailable"
-            )
-        _embeddings = OpenAIEmbeddings(
-            model=EMBEDDING_MODEL,
-            openai_api_key=settings.openai_api_key,
+def normalize(vec) -> np.ndarray:
+    """Return vec as a unit-length float32 array (zero vectors are returned as-is)."""
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm else arr
+
+
+def to_bson_vector(vec) -> Binary:
+    """Pack a vector as BSON float32 binData (subtype 9), which Atlas Vector Search indexes.
+
+    4 bytes per dimension instead of 8 plus a type tag for an array of doubles.
+    """
+    return Binary.from_vector(np.asarray(vec, dtype=np.float32).tolist(), BinaryVectorDtype.FLOAT32)
+
+
+def from_bson_vector(value) -> np.ndarray:
+    """Decode a stored embedding, packed binData or a legacy array of doubles."""
+    if isinstance(value, Binary):
+        return np.asarray(value.as_vector().data, dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+class CachedEmbeddings(Embeddings):
+    """LRU-cached embeddings; cache misses in a call go to the model in one batch.
+
+    Vectors are L2-normalised so the vector index can rank by dotProduct.
+    They are cached per instance, and there is one instance per model, so a
+    model change never serves stale vectors. They are held as float32 arrays
+    (6 KB each) rather than lists of Python floats (~50 KB each). Calls arrive
+    via asyncio.to_thread, hence the lock.
+    """
+
+    def __init__(self, inner: OpenAIEmbeddings, maxsize: int = _EMBEDDING_CACHE_MAX):
+        self._inner = inner
+        self._maxsize = maxsize
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in texts:
+                vec = self._cache.get(text)
+                if vec is not None:
+                    self._cache.move_to_end(text)
+                    found[text] = vec
+        missing = list(dict.fromkeys(t for t in texts if t not in found))
+        if missing:
+            fresh = self._inner.embed_documents(missing)
+            with self._lock:
+                for text, vec in zip(missing, fresh):
+                    found[text] = self._cache[text] = normalize(vec)
+                while len(self._cache) > self._maxsize:
+                    self._cache.popitem(last=False)
+        return [found[t].tolist() for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+@functools.cache
+def get_embeddings() -> CachedEmbeddings:
+    if not is_available():
+        raise RuntimeError(
+            "OPENAI_API_KEY is not set — vector search is unavailable"
         )
-    return _embeddings
+    return CachedEmbeddings(OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        openai_api_key=settings.openai_api_key,
+    ))
 
 
 def build_search_text(name: str, category: str, description: str | None = None) -> str:
@@ -33,3 +107,34 @@ def build_search_text(name: str, category: str, description: str | None = None)
     if description:
         parts.append(description)
     return " — ".join(parts)
+
+
+def batched_texts(texts: list[str]) -> list[list[str]]:
+    """Split texts into batches that fit one embeddings request.
+
+    Tokens are estimated at four characters each.
+    """
+    batches: list[list[str]] = []
+    current: list[str] = []
+    tokens = 0
+    for text in texts:
+        cost = len(text) // 4 + 1
+        if current and (len(current) >= EMBEDDING_BATCH_SIZE or tokens + cost > EMBEDDING_BATCH_TOKENS):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(text)
+        tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def store_service_type_embedding(oid: ObjectId, slug: str, text: str) -> None:
+    """Embed a freshly created service type and attach the vector to its document."""
+    try:
+        vectors = await asyncio.to_thread(get_embeddings().embed_documents, [text])
+        await get_db().service_types.update_one(
+            {"_id": oid}, {"$set": {"embedding": to_bson_vector(vectors[0])}}
+        )
+    except Exception:
+        logger.warning("Failed to generate embedding for %s", slug, exc_info=True)
@@ -0,0 +1,25 @@
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+_client: AsyncOpenAI | None = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Process-wide AsyncOpenAI client so LLM calls share one keep-alive pool."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            max_retries=2,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    return _client
+
+
+async def close_openai_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,142 @@
+"""In-process cache for scraper LLM price extractions.
+
+Entries are scoped to the exact page text (and provider the prompt names), and
+answer a lookup in two ways:
+  1. exact — the same normalised query was already extracted from this page;
+  2. semantic — a query whose embedding has cosine similarity of at least
+     _SIMILARITY_THRESHOLD with one already extracted from this page, provided
+     both carry the same numeric tokens (so "iphone 13" never reuses "iphone 14").
+
+"No price found" results are cached too. Entries expire after _TTL_SECONDS.
+Query vectors are stored int8-quantised with a per-vector scale (~1.5 KB
+instead of 6 KB each); cosine ranking survives the rounding comfortably at
+the similarity threshold used here.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services import embeddings as embeddings_svc
+
+logger = logging.getLogger(__name__)
+
+PriceResult = tuple[str, float] | None
+
+_TTL_SECONDS = 6 * 3600
+_MAX_PAGES = 1024
+_MAX_QUERIES_PER_PAGE = 32
+_SIMILARITY_THRESHOLD = 0.9
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMERIC_TOKEN_RE = re.compile(r"\w*\d\w*")
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    query: str
+    numbers: frozenset[str]
+    vector: np.ndarray | None  # int8, L2-normalised before quantising
+    scale: float
+    result: PriceResult
+    expires_at: float
+
+
+_pages: OrderedDict[tuple[str, str], list[_Entry]] = OrderedDict()
+
+
+def _page_key(html_text: str, provider_name: str) -> tuple[str, str]:
+    digest = hashlib.sha1(html_text.encode("utf-8", "replace")).hexdigest()
+    return digest, provider_name
+
+
+def _normalise(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", query.strip().lower())
+
+
+async def _embed(query: str) -> np.ndarray | None:
+    if not embeddings_svc.is_available():
+        return None
+    try:
+        vec = await asyncio.to_thread(embeddings_svc.get_embeddings().embed_query, query)
+    except Exception:
+        logger.debug("Failed to embed %r for the price cache", query, exc_info=True)
+        return None
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm else None
+
+
+def _quantise(vec: np.ndarray | None) -> tuple[np.ndarray | None, float]:
+    if vec is None:
+        return None, 0.0
+    max_abs = float(np.abs(vec).max())
+    if not max_abs:
+        return None, 0.0
+    return np.rint(vec * (127 / max_abs)).astype(np.int8), max_abs / 127
+
+
+def _live_entries(key: tuple[str, str]) -> list[_Entry]:
+    entries = _pages.get(key)
+    if entries is None:
+        return []
+    now = time.monotonic()
+    entries[:] = [e for e in entries if e.expires_at > now]
+    if not entries:
+        del _pages[key]
+        return []
+    _pages.move_to_end(key)
+    return entries
+
+
+async def get(html_text: str, query: str, provider_name: str = "") -> tuple[bool, PriceResult]:
+    """Return (hit, result) for a previous extraction of query from this page."""
+    entries = _live_entries(_page_key(html_text, provider_name))
+    if not entries:
+        return False, None
+
+    q = _normalise(query)
+    for entry in entries:
+        if entry.query == q:
+            return True, entry.result
+
+    numbers = frozenset(_NUMERIC_TOKEN_RE.findall(q))
+    candidates = [e for e in entries if e.vector is not None and e.numbers == numbers]
+    if not candidates:
+        return False, None
+    vec = await _embed(q)
+    if vec is None:
+        return False, None
+    scales = np.fromiter((e.scale for e in candidates), np.float32, len(candidates))
+    sims = (np.stack([e.vector for e in candidates]).astype(np.float32) @ vec) * scales
+    best = int(sims.argmax())
+    if sims[best] >= _SIMILARITY_THRESHOLD:
+        logger.debug("Semantic price-cache hit: %r ~ %r (%.3f)", q, candidates[best].query, sims[best])
+        return True, candidates[best].result
+    return False, None
+
+
+async def put(html_text: str, query: str, provider_name: str, result: PriceResult) -> None:
+    """Record the outcome of extracting query from this page."""
+    q = _normalise(query)
+    vector, scale = _quantise(await _embed(q))
+    entry = _Entry(
+        query=q,
+        numbers=frozenset(_NUMERIC_TOKEN_RE.findall(q)),
+        vector=vector,
+        scale=scale,
+        result=result,
+        expires_at=time.monotonic() + _TTL_SECONDS,
+    )
+    key = _page_key(html_text, provider_name)
+    entries = _pages.setdefault(key, [])
+    entries[:] = [e for e in entries if e.query != q][-(_MAX_QUERIES_PER_PAGE - 1):]
+    entries.append(entry)
+    _pages.move_to_end(key)
+    while len(_pages) > _MAX_PAGES:
+        _pages.popitem(last=False)
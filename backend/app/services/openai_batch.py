@@ -0,0 +1,62 @@
+"""Thin wrapper around the OpenAI Batch API for LLM work that can wait.
+
+Batch jobs cost half as much as synchronous calls and run against a separate
+rate limit, in exchange for results arriving some time within 24 hours.
+"""
+
+import json
+import logging
+
+from app.services.llm import get_openai_client
+
+logger = logging.getLogger(__name__)
+
+_ENDPOINT = "/v1/chat/completions"
+_PENDING_STATUSES = {"validating", "in_progress", "finalizing"}
+
+
+async def submit_chat_batch(requests: list[tuple[str, dict]]) -> str:
+    """Upload (custom_id, chat-completions body) pairs as one batch job. Returns the batch id."""
+    lines = "\n".join(
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": _ENDPOINT, "body": body})
+        for custom_id, body in requests
+    )
+    client = get_openai_client()
+    input_file = await client.files.create(
+        file=("batch.jsonl", lines.encode("utf-8")),
+        purpose="batch",
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=_ENDPOINT,
+        completion_window="24h",
+    )
+    logger.info("Submitted OpenAI batch %s with %d requests", batch.id, len(requests))
+    return batch.id
+
+
+async def fetch_batch_results(batch_id: str) -> dict[str, str] | None:
+    """Return custom_id -> message content once the batch has finished.
+
+    Returns None while the batch is still running, and an empty dict when it
+    failed, expired or was cancelled.
+    """
+    client = get_openai_client()
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status in _PENDING_STATUSES:
+        return None
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.warning("OpenAI batch %s ended with status %s", batch_id, batch.status)
+        return {}
+
+    content = await client.files.content(batch.output_file_id)
+    results: dict[str, str] = {}
+    for line in content.text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        body = (record.get("response") or {}).get("body") or {}
+        choices = body.get("choices") or []
+        if choices:
+            results[record["custom_id"]] = choices[0]["message"]["content"] or ""
+    return results
@@ -1,23 +1,36 @@
 import asyncio
-import json
+import functools
+import itertools
 import logging
 import re
 import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime, timezone
+from typing import Literal
 from urllib.parse import urljoin, urlparse
 
 import httpx
-from bs4 import BeautifulSoup
-from openai import AsyncOpenAI
+import lxml.html
+from lxml.etree import ParserError, XPath, strip_elements
+from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
 
 from app.config import settings
 from app.db import get_db
+from app.services import llm_price_cache
+from app.services.llm import get_openai_client
 
 try:
     from linkup import LinkupClient
 except ImportError:
     LinkupClient = None
 
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
 HEADERS = {
@@ -25,11 +38,15 @@ HEADERS = {
     "Accept-Language": "en-GB,en;q=0.9",
 }
 NOISE_TAGS = ["script", "style", "nav", "footer", "header", "noscript", "svg"]
+CONTAINER_TAGS = frozenset({"div", "li", "article", "section", "main", "body"})
+_HREF_XPATH = XPath("//a/@href", smart_strings=False)
 SKIP_SUBSTRINGS = [
     "blog", "news", "about", "contact", "privacy", "terms",
     "login", "cart", "facebook", "instagram", ".pdf",
 ]
 PRICE_RE = re.compile(r"([₹£€$])\s*([0-9]{1,6})(?:[.,]([0-9]{1,2}))?")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_WORD_SPLIT_RE = re.compile(r"[^a-z0-9]+")
 TOP_LINKS = 3
 TOP_SUBLINKS = 2
 PRICE_PAGE_KEYWORDS = {
@@ -38,6 +55,9 @@ PRICE_PAGE_KEYWORDS = {
     "services", "repair", "repairs", "quote", "menu",
 }
 MAX_LLM_TEXT = 8_000
+MAX_HTML_BYTES = 512 * 1024
+MAX_DECLARED_BYTES = 5 * 1024 * 1024
+HTML_CONTENT_TYPES = frozenset({"text/html", "application/xhtml+xml"})
 MIN_OVERLAP_FOR_LLM = 2
 MIN_OVERLAP_FOR_LINKUP = 2
 
@@ -58,27 +78,46 @@ Rules:
 """
 
 
+# Structured-output schema for _llm_extract_price (a docstring would be sent to the model).
+class _PriceExtraction(BaseModel):
+    price: float | None
+    currency_symbol: Literal["₹", "£", "€", "$"] | None
+
+
+_CURRENCY_BY_SYMBOL = {"₹": "INR", "€": "EUR", "£": "GBP", "$": "USD"}
+
+
 def _currency_from_symbol(sym: str) -> str:
-    return {"₹": "INR", "€": "EUR", "£": "GBP", "$": "USD"}.get(sym, "")
+    return _CURRENCY_BY_SYMBOL.get(sym, "")
 
 
-def _tokenize_query(q: str) -> list[str]:
-    return [t for t in re.findall(r"[a-z0-9]+", q.lower()) if len(t) > 1]
+@functools.lru_cache(maxsize=1024)
+def _tokenize_query(q: str) -> tuple[str, ...]:
+    return tuple(t for t in _TOKEN_RE.findall(q.lower()) if len(t) > 1)
 
 
-def _build_phrases(tokens: list[str]) -> list[str]:
+@functools.lru_cache(maxsize=1024)
+def _build_phrases(tokens: tuple[str, ...]) -> tuple[str, ...]:
     phrases: list[str] = []
     for i in range(len(tokens) - 2):
         phrases.append(f"{tokens[i]} {tokens[i+1]} {tokens[i+2]}")
     for i in range(len(tokens) - 1):
         phrases.append(f"{tokens[i]} {tokens[i+1]}")
-    return sorted(set(phrases), key=lambda x: -len(x))
+    return tuple(sorted(set(phrases), key=lambda x: -len(x)))
 
 
-def _phrase_present(text_lower: str, phrase: str) -> bool:
-    parts = phrase.split()
-    pat = r"\b" + r"[\s\-]+".join(map(re.escape, parts)) + r"\b"
-    return re.search(pat, text_lower) is not None
+@functools.lru_cache(maxsize=2048)
+def _phrases_pattern(phrases: tuple[str, ...]):
+    """One alternation matching any phrase, words separated by whitespace or hyphens.
+
+    Compiled with RE2 when installed: a DFA scan of the container text with no
+    backtracking. RE2's \\s is ASCII-only, so NBSP is added to the separator.
+    PRICE_RE stays on stdlib re, which is faster for its short, anchored matches.
+    """
+    sep = r"[\s\x{a0}\-]+" if re2 is not None else r"[\s\-]+"
+    alternatives = (sep.join(map(re.escape, p.split())) for p in phrases)
+    pattern = r"\b(?:" + "|".join(alternatives) + r")\b"
+    return re2.compile(pattern) if re2 is not None else re.compile(pattern)
 
 
 def _parse_price(m: re.Match) -> tuple[str, float]:
@@ -105,9 +144,9 @@ def _should_skip(u: str) -> bool:
     return any(x in path for x in SKIP_SUBSTRINGS)
 
 
-def _score_url(u: str, tokens: list[str]) -> int:
+def _score_url(u: str, tokens: tuple[str, ...]) -> int:
     path = (urlparse(u).path or "").lower()
-    words = [w for w in re.split(r"[^a-z0-9]+", path) if w]
+    words = [w for w in _WORD_SPLIT_RE.split(path) if w]
     tset = set(tokens)
     overlap = sum(1 for w in words if w in tset)
     extra = sum(1 for w in words if w not in tset)
@@ -115,12 +154,45 @@ def _score_url(u: str, tokens: list[str]) -> int:
     return overlap * 10 - extra + price_bonus
 
 
-def _extract_links(page_url: str, html: str, host: str, tokens: list[str]) -> list[str]:
-    soup = BeautifulSoup(html, "lxml")
+def _parse_page(html: str) -> tuple[lxml.html.HtmlElement | None, list[str]]:
+    """Parse a page once into its noise-stripped tree plus every raw <a href>.
+
+    hrefs are collected before stripping so nav/footer links still count.
+    """
+    try:
+        # Parse UTF-8 bytes with a fixed encoding so <meta charset>/XML declarations
+        # in already-decoded text can't make lxml reject or re-decode it.
+        root = lxml.html.document_fromstring(
+            html.encode("utf-8", "replace"),
+            parser=lxml.html.HTMLParser(encoding="utf-8"),
+        )
+    except (ParserError, ValueError):
+        return None, []
+    hrefs = _HREF_XPATH(root)
+    strip_elements(root, *NOISE_TAGS, with_tail=False)
+    return root, hrefs
+
+
+def _element_text(el: lxml.html.HtmlElement, limit: int | None = None) -> str | None:
+    """Whitespace-joined text of el; None as soon as it would exceed limit chars."""
+    parts: list[str] = []
+    size = -1
+    for piece in el.itertext():
+        piece = piece.strip()
+        if not piece:
+            continue
+        size += len(piece) + 1
+        if limit is not None and size > limit:
+            return None
+        parts.append(piece)
+    return " ".join(parts)
+
+
+def _extract_links(page_url: str, hrefs: list[str], host: str, tokens: tuple[str, ...]) -> list[str]:
     out: list[str] = []
     seen: set[str] = set()
-    for a in soup.find_all("a", href=True):
-        full = urljoin(page_url, a["href"].strip())
+    for href in hrefs:
+        full = urljoin(page_url, href.strip())
         if not _same_site(full, host):
             continue
         if full in seen or _should_skip(full):
@@ -132,75 +204,168 @@ def _extract_links(page_url: str, html: str, host: str, tokens: list[str]) -> li
 
 
 MAX_CONTAINER_CHARS = 600
+_CURRENCY_TEXT_XPATH = XPath(
+    "//text()[" + " or ".join(f"contains(., '{c}')" for c in "₹£€$") + "]"
+)
 
 
-def _find_price_in_html(html: str, tokens: list[str]) -> tuple[str, float] | None:
-    soup = BeautifulSoup(html, "lxml")
-    for t in soup(NOISE_TAGS):
-        t.decompose()
+def _find_price_in_html(root: lxml.html.HtmlElement, tokens: tuple[str, ...]) -> tuple[str, float] | None:
     phrases = _build_phrases(tokens)
-    top_phrases = phrases[:3]
+    top_phrases = _phrases_pattern(phrases[:3]) if phrases else None
 
     def container_matches(text_lower: str) -> bool:
         if tokens and not all(t in text_lower for t in tokens):
             return False
-        if top_phrases and not any(_phrase_present(text_lower, p) for p in top_phrases):
+        if top_phrases is not None and not top_phrases.search(text_lower):
             return False
         return True
 
     best: tuple[str, float, int] | None = None  # (sym, val, ctx_len)
+    # Price nodes on the same page share containers; score each container once.
+    containers: dict[lxml.html.HtmlElement, tuple[int, bool] | None] = {}
 
-    for node in soup.find_all(string=lambda s: s and any(c in s for c in "₹£€$")):
-        raw = str(node)
-        m = PRICE_RE.search(raw)
+    for node in _CURRENCY_TEXT_XPATH(root):
+        m = PRICE_RE.search(node)
         if not m:
             continue
         sym, val = _parse_price(m)
         if val == 0.0:
             continue
-        cur = node.parent
-        for _ in range(12):
-            if cur is None:
+        el = node.getparent()
+        if node.is_tail:
+            el = el.getparent()
+        own = (el,) if el.tag in CONTAINER_TAGS else ()
+        for cur in itertools.chain(own, el.iterancestors(*CONTAINER_TAGS)):
+            if cur not in containers:
+                ctx = _element_text(cur, MAX_CONTAINER_CHARS)
+                containers[cur] = None if ctx is None else (len(ctx), container_matches(ctx.lower()))
+            scored = containers[cur]
+            if scored is None:
+                # Ancestors only get longer, so nothing further up can fit either.
+                break
+            ctx_len, matches = scored
+            if matches:
+                if best is None or ctx_len < best[2]:
+                    best = (sym, round(val, 2), ctx_len)
                 break
-            if cur.name in ("div", "li", "article", "section", "main", "body"):
-                ctx = cur.get_text(" ", strip=True).lower()
-                ctx_len = len(ctx)
-                if ctx_len > MAX_CONTAINER_CHARS:
-                    continue
-                if container_matches(ctx):
-                    if best is None or ctx_len < best[2]:
-                        best = (sym, round(val, 2), ctx_len)
-                    break
-            cur = cur.parent
 
     return (best[0], best[1]) if best else None
 
 
-def _fast_hit(html: str, tokens: list[str]) -> tuple[str, float] | None:
-    if not any(c in html for c in "₹£€$"):
+def _fast_hit(
+    html: str, html_lower: str, root: lxml.html.HtmlElement | None, tokens: tuple[str, ...]
+) -> tuple[str, float] | None:
+    if root is None or not any(c in html for c in "₹£€$"):
         return None
-    low = html.lower()
-    if tokens and not all(t in low for t in tokens):
+    if tokens and not all(t in html_lower for t in tokens):
         return None
-    return _find_price_in_html(html, tokens)
+    return _find_price_in_html(root, tokens)
+
+
+def _html_to_text(root: lxml.html.HtmlElement, max_chars: int = MAX_LLM_TEXT) -> str:
+    """Plain text of a noise-stripped page, truncated for LLM context."""
+    return _element_text(root)[:max_chars]
+
+
+def _token_overlap(html_lower: str, tokens: tuple[str, ...]) -> int:
+    return sum(1 for t in tokens if t in html_lower)
+
+
+_scrape_client: httpx.AsyncClient | None = None
+
+
+def _get_scrape_client() -> httpx.AsyncClient:
+    """Process-wide client so crawls of different providers share keep-alive connections."""
+    global _scrape_client
+    if _scrape_client is None:
+        _scrape_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(connect=4.0, read=8.0, write=4.0, pool=4.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=10),
+            headers=HEADERS,
+            follow_redirects=True,
+        )
+    return _scrape_client
+
+
+async def close_scrape_client() -> None:
+    global _scrape_client
+    if _scrape_client is not None:
+        await _scrape_client.aclose()
+        _scrape_client = None
+
+
+async def _download(c: httpx.AsyncClient, url: str) -> tuple[str | None, bool]:
+    """GET a page, reading at most MAX_HTML_BYTES of the body.
+
+    Returns (html, cacheable). html is None, without the body being read,
+    when the response isn't HTML or declares a body over MAX_DECLARED_BYTES.
+    """
+    async with c.stream("GET", url) as r:
+        r.raise_for_status()
+        cache_control = r.headers.get("cache-control", "").lower()
+        cacheable = "no-store" not in cache_control and "private" not in cache_control
+        content_type = r.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            return None, cacheable
+        declared = r.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > MAX_DECLARED_BYTES:
+            return None, cacheable
+        buf = bytearray()
+        async for chunk in r.aiter_bytes():
+            buf += chunk
+            if len(buf) >= MAX_HTML_BYTES:
+                break
+        encoding = r.encoding or "utf-8"
+    try:
+        return bytes(buf[:MAX_HTML_BYTES]).decode(encoding, errors="replace"), cacheable
+    except LookupError:
+        return bytes(buf[:MAX_HTML_BYTES]).decode("utf-8", errors="replace"), cacheable
+
 
+_PAGE_CACHE_TTL = 600  # seconds
+_PAGE_CACHE_MAX = 128
+_page_cache: OrderedDict[str, tuple[float, str | None]] = OrderedDict()
 
-def _html_to_text(html: str, max_chars: int = MAX_LLM_TEXT) -> str:
-    """Strip noise tags and return plain text, truncated for LLM context."""
-    soup = BeautifulSoup(html, "lxml")
-    for t in soup(NOISE_TAGS):
-        t.decompose()
-    text = soup.get_text(" ", strip=True)
-    return text[:max_chars]
 
+async def _fetch(c: httpx.AsyncClient, url: str) -> str | None:
+    """_download with a short-lived per-URL cache.
 
-def _token_overlap(html: str, tokens: list[str]) -> int:
-    low = html.lower()
-    return sum(1 for t in tokens if t in low)
+    Franchise locations often link the same pricing page, and repeat searches
+    re-crawl the same sites; both are served from memory for _PAGE_CACHE_TTL.
+    """
+    cached = _page_cache.get(url)
+    if cached is not None:
+        if cached[0] > time.monotonic():
+            _page_cache.move_to_end(url)
+            return cached[1]
+        del _page_cache[url]
+
+    html, cacheable = await _download(c, url)
+    if cacheable:
+        _page_cache[url] = (time.monotonic() + _PAGE_CACHE_TTL, html)
+        _page_cache.move_to_end(url)
+        while len(_page_cache) > _PAGE_CACHE_MAX:
+            _page_cache.popitem(last=False)
+    return html
+
+
+def _scan_page(
+    html: str, tokens: tuple[str, ...]
+) -> tuple[lxml.html.HtmlElement | None, list[str], tuple[str, float] | None, int]:
+    """Parse a page, look for a regex price hit and count query-token overlap.
+
+    CPU-bound; run off the event loop. The page is lowercased exactly once.
+    """
+    root, hrefs = _parse_page(html)
+    html_lower = html.lower()
+    return root, hrefs, _fast_hit(html, html_lower, root, tokens), _token_overlap(html_lower, tokens)
 
 
-def _scrape_sync(website: str, query: str) -> dict:
-    """Synchronous multi-level crawl of a single website.
+async def _scrape_async(website: str, query: str) -> dict:
+    """Multi-level crawl of a single website.
+
+    Fetches the home page, then its top links concurrently, then all of
+    their top sub-links concurrently; hits are taken in link-rank order.
 
     Returns a dict with:
       hit:       price info dict if regex matched, else None
@@ -211,57 +376,63 @@ def _scrape_sync(website: str, query: str) -> dict:
     start = website.rstrip("/")
     host = urlparse(start).netloc
 
-    best_html: str | None = None
+    best_root: lxml.html.HtmlElement | None = None
     best_url: str | None = None
     best_overlap = -1
 
-    def _track(url: str, raw_html: str):
-        nonlocal best_html, best_url, best_overlap
-        overlap = _token_overlap(raw_html, tokens)
+    def _track(url: str, root: lxml.html.HtmlElement | None, overlap: int):
+        nonlocal best_root, best_url, best_overlap
+        if root is None:
+            return
         if overlap > best_overlap:
             best_overlap = overlap
-            best_html = raw_html
+            best_root = root
             best_url = url
 
-    timeout = httpx.Timeout(connect=4.0, read=8.0, write=4.0, pool=4.0)
-    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=10)
+    async def _visit(c: httpx.AsyncClient, url: str):
+        try:
+            html = await _fetch(c, url)
+        except httpx.HTTPError:
+            return None
+        if html is None:
+            return None
+        return (url, *await asyncio.to_thread(_scan_page, html, tokens))
 
+    c = _get_scrape_client()
     try:
-        with httpx.Client(
-            timeout=timeout, limits=limits, headers=HEADERS,
-            follow_redirects=True, verify=True,
-        ) as c:
-            home_html = c.get(start).text
-            hit = _fast_hit(home_html, tokens)
+        home = await _visit(c, start)
+        lvl1: list[str] = []
+        if home is not None:
+            _, home_root, home_hrefs, hit, overlap = home
             if hit:
                 return {"hit": {"page_url": start, "symbol": hit[0], "price": hit[1]}}
-            _track(start, home_html)
-
-            lvl1 = _extract_links(start, home_html, host, tokens)[:TOP_LINKS]
-            for u1 in lvl1:
-                try:
-                    html1 = c.get(u1).text
-                except httpx.HTTPError:
-                    continue
-                hit = _fast_hit(html1, tokens)
-                if hit:
-                    return {"hit": {"page_url": u1, "symbol": hit[0], "price": hit[1]}}
-                _track(u1, html1)
-
-                lvl2 = _extract_links(u1, html1, host, tokens)[:TOP_SUBLINKS]
-                for u2 in lvl2:
-                    try:
-                        html2 = c.get(u2).text
-                    except httpx.HTTPError:
-                        continue
-                    hit = _fast_hit(html2, tokens)
-                    if hit:
-                        return {"hit": {"page_url": u2, "symbol": hit[0], "price": hit[1]}}
-                    _track(u2, html2)
+            _track(start, home_root, overlap)
+            lvl1 = _extract_links(start, home_hrefs, host, tokens)[:TOP_LINKS]
+
+        seen = {start, *lvl1}
+        lvl2: list[str] = []
+        for page in await asyncio.gather(*(_visit(c, u) for u in lvl1)):
+            if page is None:
+                continue
+            u1, root1, hrefs1, hit, overlap = page
+            if hit:
+                return {"hit": {"page_url": u1, "symbol": hit[0], "price": hit[1]}}
+            _track(u1, root1, overlap)
+            sublinks = [u for u in _extract_links(u1, hrefs1, host, tokens) if u not in seen]
+            seen.update(sublinks[:TOP_SUBLINKS])
+            lvl2.extend(sublinks[:TOP_SUBLINKS])
+
+        for page in await asyncio.gather(*(_visit(c, u) for u in lvl2)):
+            if page is None:
+                continue
+            u2, root2, _, hit, overlap = page
+            if hit:
+                return {"hit": {"page_url": u2, "symbol": hit[0], "price": hit[1]}}
+            _track(u2, root2, overlap)
     except Exception:
         logger.debug("Scrape failed for %s", website, exc_info=True)
 
-    fallback_text = _html_to_text(best_html) if best_html else None
+    fallback_text = _html_to_text(best_root) if best_root is not None else None
     return {
         "hit": None,
         "html_text": fallback_text,
@@ -278,6 +449,10 @@ async def _llm_extract_price(
     """Ask GPT to extract a price from scraped page text."""
     if not settings.openai_api_key:
         return None
+    cached, result = await llm_price_cache.get(html_text, query, provider_name)
+    if cached:
+        return result
+    result = None
     try:
         user_msg = f"Service: {query}\n"
         if provider_name:
@@ -288,46 +463,64 @@ async def _llm_extract_price(
             )
         user_msg += f"\nWebpage text:\n{html_text}"
 
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        resp = await client.chat.completions.create(
+        client = get_openai_client()
+        resp = await client.chat.completions.parse(
             model="gpt-4o-mini",
             temperature=0,
             max_tokens=100,
-            response_format={"type": "json_object"},
+            response_format=_PriceExtraction,
             messages=[
                 {"role": "system", "content": _PRICE_EXTRACT_PROMPT},
                 {"role": "user", "content": user_msg},
             ],
         )
-        content = resp.choices[0].message.content.strip()
-        parsed = json.loads(content)
-        price = parsed.get("price")
-        symbol = parsed.get("currency_symbol", "₹")
-        if price is not None and isinstance(price, (int, float)) and price > 0:
-            logger.info("LLM extracted price %s%.2f for %r", symbol, price, query)
-            return symbol, round(float(price), 2)
+        parsed = resp.choices[0].message.parsed
+        if parsed is not None and parsed.price is not None and parsed.price > 0:
+            symbol = parsed.currency_symbol or "₹"
+            logger.info("LLM extracted price %s%.2f for %r", symbol, parsed.price, query)
+            result = symbol, round(parsed.price, 2)
     except Exception:
         logger.debug("LLM price extraction failed", exc_info=True)
-    return None
+        return None
+    await llm_price_cache.put(html_text, query, provider_name, result)
+    return result
 
 
+@functools.lru_cache(maxsize=4096)
 def _domain_of(url: str) -> str:
     """Extract the registrable domain (e.g. 'kwik-fit.com') from a URL."""
     netloc = urlparse(url).netloc.lower().removeprefix("www.")
     return netloc
 
 
-def _source_matches_provider(source_url: str, provider_website: str) -> bool:
+def _source_matches_provider(source_url: str, provider_domain: str) -> bool:
     """Check if a Linkup source URL belongs to the provider's own domain."""
-    if not source_url or not provider_website:
+    if not source_url or not provider_domain:
         return False
-    return _domain_of(source_url) == _domain_of(provider_website)
+    return _domain_of(source_url) == provider_domain
 
 
 _linkup_circuit_open_until: float = 0.0
 _LINKUP_CIRCUIT_COOLDOWN = 120  # seconds to skip Linkup after a timeout
 _LINKUP_TIMEOUT = 15  # seconds per search call
-_linkup_sem = asyncio.Semaphore(1)
+_LINKUP_CONCURRENCY = 4
+
+_loop_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def _loop_semaphore(name: str, size: int) -> asyncio.Semaphore:
+    """Semaphore scoped to the running event loop, created on first use.
+
+    Module-level semaphores bind to whichever loop first waits on them; keying
+    by loop keeps workers/test harnesses that start fresh loops from sharing one.
+    """
+    per_loop = _loop_semaphores.setdefault(asyncio.get_running_loop(), {})
+    sem = per_loop.get(name)
+    if sem is None:
+        sem = per_loop[name] = asyncio.Semaphore(size)
+    return sem
 
 
 async def _linkup_search_price(
@@ -340,8 +533,9 @@ async def _linkup_search_price(
     Scopes the search to the provider's website domain and validates
     that the returned source actually belongs to the provider.
 
-    Calls are serialised via a semaphore so that a timeout on the first
-    call trips the circuit breaker before subsequent calls are attempted.
+    At most _LINKUP_CONCURRENCY calls run at once, so a timeout trips the
+    circuit breaker before the queued calls behind it are attempted, without
+    serialising unrelated providers behind a single slow search.
     Fast errors (e.g. 504) do NOT trip the breaker because Linkup may
     succeed on the very next call.
     """
@@ -354,7 +548,7 @@ async def _linkup_search_price(
         logger.debug("Linkup circuit open — skipping search for %s", provider_name)
         return None
 
-    async with _linkup_sem:
+    async with _loop_semaphore("linkup", _LINKUP_CONCURRENCY):
         if time.monotonic() < _linkup_circuit_open_until:
             logger.debug("Linkup circuit open — skipping search for %s", provider_name)
             return None
@@ -400,7 +594,7 @@ async def _linkup_search_price(
         has_provider_source = False
         for src in sources:
             src_url = getattr(src, "url", "") or ""
-            if src_url and _source_matches_provider(src_url, website):
+            if src_url and _source_matches_provider(src_url, domain):
                 source_url = src_url
                 has_provider_source = True
                 break
@@ -444,7 +638,7 @@ async def scrape_provider_price(
             return linkup_hit
         return None
 
-    result = await asyncio.to_thread(_scrape_sync, website, query)
+    result = await _scrape_async(website, query)
     overlap = result.get("best_overlap", 0)
 
     if result.get("hit"):
@@ -481,6 +675,9 @@ async def scrape_provider_price(
     return None
 
 
+_MAX_CONCURRENT_PROVIDERS = 16
+
+
 async def scrape_and_store_prices(
     providers: list[dict],
     query: str,
@@ -504,49 +701,58 @@ async def scrape_and_store_prices(
         len(scrapable), len(providers), query,
     )
 
-    tasks = [
-        scrape_provider_price(p["website"], query, provider_name=p.get("name", ""))
-        for p in scrapable
-    ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def _scrape_one(p: dict) -> dict | None:
+        async with _loop_semaphore("providers", _MAX_CONCURRENT_PROVIDERS):
+            return await scrape_provider_price(p["website"], query, provider_name=p.get("name", ""))
+
+    results = await asyncio.gather(*(_scrape_one(p) for p in scrapable), return_exceptions=True)
 
     db = get_db()
-    observations: dict[str, dict] = {}
+    stored: list[tuple[dict, dict, dict]] = []  # (provider, result, obs_doc)
 
     for provider, result in zip(scrapable, results):
         if isinstance(result, Exception) or result is None:
             continue
 
-        pid = provider["_id"]
-        currency = _currency_from_symbol(result["symbol"])
-        source_type = result.get("source_type", "scrape")
         now = datetime.now(timezone.utc)
-
-        obs_doc = {
-            "provider_id": pid,
+        stored.append((provider, result, {
+            "provider_id": provider["_id"],
             "service_type": service_type_slug,
             "category": service_type_slug,
             "price": result["price"],
-            "currency": currency,
-            "source_type": source_type,
+            "currency": _currency_from_symbol(result["symbol"]),
+            "source_type": result.get("source_type", "scrape"),
             "source_url": result["page_url"],
             "location": provider["location"],
             "observed_at": now,
             "created_at": now,
-        }
+        }))
+
+    failed: set[int] = set()
+    if stored:
         try:
-            await db.observations.insert_one(obs_doc)
-            observations[str(pid)] = obs_doc
-            logger.info(
-                "[%s] Stored price %s%.2f for %s from %s",
-                source_type, result["symbol"], result["price"],
-                provider["name"], result["page_url"],
-            )
+            await db.observations.insert_many([doc for _, _, doc in stored], ordered=False)
+        except BulkWriteError as bwe:
+            for err in bwe.details.get("writeErrors", []):
+                failed.add(err["index"])
+                logger.warning(
+                    "Failed to store observation for %s: %s",
+                    stored[err["index"]][0]["name"], err.get("errmsg"),
+                )
         except Exception:
-            logger.warning(
-                "Failed to store observation for %s", provider["name"],
-                exc_info=True,
-            )
+            logger.warning("Failed to store %d scraped observations", len(stored), exc_info=True)
+            failed.update(range(len(stored)))
+
+    observations: dict[str, dict] = {}
+    for idx, (provider, result, obs_doc) in enumerate(stored):
+        if idx in failed:
+            continue
+        observations[str(provider["_id"])] = obs_doc
+        logger.info(
+            "[%s] Stored price %s%.2f for %s from %s",
+            obs_doc["source_type"], result["symbol"], result["price"],
+            provider["name"], result["page_url"],
+        )
 
     logger.info(
         "Scraping complete: %d/%d providers returned prices",
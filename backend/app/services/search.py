@@ -1,15 +1,16 @@
 import asyncio
-import json
 import logging
-import math
-import statistics
+from collections import Counter, OrderedDict
 
+import numpy as np
 from bson import ObjectId
 from langchain_mongodb import MongoDBAtlasVectorSearch
-from openai import AsyncOpenAI
+from pydantic import BaseModel
+from pymongo.errors import OperationFailure
 
 from app.config import settings
 from app.db import get_db, get_sync_db
+from app.models.provider import GeoJSONPoint
 from app.models.search import (
     MatchedServiceType,
     ObservationSummary,
@@ -19,7 +20,7 @@ from app.models.search import (
 )
 from app.services.discovery import discover_external, name_to_slug
 from app.services import embeddings as embeddings_svc
-from app.services.email_service import check_for_replies
+from app.services.llm import get_openai_client
 from app.services.scraper import scrape_and_store_prices
 
 logger = logging.getLogger(__name__)
@@ -28,33 +29,95 @@ VECTOR_INDEX_NAME = "service_types_vector"
 TEXT_INDEX_NAME = "service_types_text"
 VECTOR_SCORE_THRESHOLD = 0.75
 TEXT_SCORE_THRESHOLD = 0.10
+# A lone vector match this close is taken as-is, without the intent LLM call.
+# Only vector scores qualify: Atlas text scores are unbounded, not confidences.
+INTENT_SKIP_SCORE = 0.95
+
+# Provider fields read by _provider_from_doc; everything else stays on the server.
+_PROVIDER_PROJECTION = {
+    "name": 1,
+    "category": 1,
+    "address": 1,
+    "city": 1,
+    "location": 1,
+    "rating": 1,
+    "review_count": 1,
+    "description": 1,
+    "website": 1,
+}
+
+# Joins each provider's category slug to its service-type name as category_label.
+_CATEGORY_LABEL_STAGES = [
+    {
+        "$lookup": {
+            "from": "service_types",
+            "localField": "category",
+            "foreignField": "slug",
+            "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+            "as": "_category",
+        }
+    },
+    {"$set": {"category_label": {"$first": "$_category.name"}}},
+    {"$unset": "_category"},
+]
+
+_SCRAPE_DONE_MAX = 10_000
+
+
+class _LRUSet:
+    """Set of the most recently added keys, capped at maxsize entries."""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._keys: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, keys) -> None:
+        for key in keys:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+        while len(self._keys) > self._maxsize:
+            self._keys.popitem(last=False)
+
 
 _scraping_provider_ids: set[str] = set()
-_scrape_done_ids: set[str] = set()
+_scrape_done_ids = _LRUSet(_SCRAPE_DONE_MAX)
+# Strong references to running scrape tasks; the loop only keeps weak ones.
+_scrape_tasks: set[asyncio.Task] = set()
 
 
-def _get_vector_store() -> MongoDBAtlasVectorSearch | None:
-    """Returns None when embeddings are not configured."""
-    if not embeddings_svc.is_available():
-        return None
-    sync_db = get_sync_db()
-    return MongoDBAtlasVectorSearch(
-        embedding=embeddings_svc.get_embeddings(),
-        collection=sync_db.service_types,
-        index_name=VECTOR_INDEX_NAME,
-        text_key="name",
-        embedding_key="embedding",
-        relevance_score_fn="cosine",
-    )
+_vector_store: MongoDBAtlasVectorSearch | None = None
 
 
-async def match_service_types_text(query: str) -> list[MatchedServiceType]:
-    """Atlas full-text search on service_types (name, slug, category).
+async def _get_vector_store() -> MongoDBAtlasVectorSearch | None:
+    """Returns None when embeddings are not configured.
 
-    Returns an empty list if the Atlas Search index is unavailable.
+    Built once and reused; rebuilt only if the sync client was replaced (e.g.
+    after db.close()).
     """
-    db = get_db()
-    pipeline = [
+    global _vector_store
+    if not embeddings_svc.is_available():
+        return None
+    sync_db = await get_sync_db()
+    if _vector_store is None or _vector_store.collection.database.client is not sync_db.client:
+        _vector_store = MongoDBAtlasVectorSearch(
+            embedding=embeddings_svc.get_embeddings(),
+            collection=sync_db.service_types,
+            index_name=VECTOR_INDEX_NAME,
+            text_key="name",
+            embedding_key="embedding",
+            relevance_score_fn="cosine",
+        )
+    return _vector_store
+
+
+def _text_search_pipeline(query: str) -> list[dict]:
+    return [
         {
             "$search": {
                 "index": TEXT_INDEX_NAME,
@@ -70,6 +133,15 @@ async def match_service_types_text(query: str) -> list[MatchedServiceType]:
         {"$limit": 10},
         {"$project": {"slug": 1, "name": 1, "score": 1}},
     ]
+
+
+async def match_service_types_text(query: str) -> list[MatchedServiceType]:
+    """Atlas full-text search on service_types (name, slug, category).
+
+    Returns an empty list if the Atlas Search index is unavailable.
+    """
+    db = get_db()
+    pipeline = _text_search_pipeline(query)
     results: list[MatchedServiceType] = []
     try:
         async for doc in db.service_types.aggregate(pipeline, maxTimeMS=4000):
@@ -91,7 +163,7 @@ async def match_service_types_vector(query: str) -> list[MatchedServiceType]:
 
     Returns an empty list when embeddings are not configured or the search fails.
     """
-    vector_store = _get_vector_store()
+    vector_store = await _get_vector_store()
     if vector_store is None:
         logger.debug("Vector search skipped — OPENAI_API_KEY not set")
         return []
@@ -120,6 +192,87 @@ async def match_service_types_vector(query: str) -> list[MatchedServiceType]:
     return results
 
 
+# Server error codes meaning a pipeline stage is unknown or not allowed where
+# it is used (e.g. $vectorSearch/$geoNear inside $unionWith): the combined
+# pipelines will never work on this cluster. Other failures, such as a
+# maxTimeMS ExecutionTimeout, only skip the combined path for that call.
+_UNSUPPORTED_STAGE_CODES = frozenset({40324, 40602, 31441})
+
+
+def _is_unsupported_stage(exc: OperationFailure) -> bool:
+    return exc.code in _UNSUPPORTED_STAGE_CODES
+
+
+_union_search_supported = True
+
+
+async def match_service_types(query: str) -> tuple[list[MatchedServiceType], list[MatchedServiceType]]:
+    """Text and vector matches from one aggregation ($search + $unionWith $vectorSearch).
+
+    Falls back to the two separate searches when embeddings are unavailable,
+    for a call whose combined pipeline fails, and permanently once the cluster
+    rejects it as unsupported ($vectorSearch inside $unionWith needs MongoDB 8.0+).
+    """
+    global _union_search_supported
+    if not (_union_search_supported and embeddings_svc.is_available()):
+        return await asyncio.gather(match_service_types_text(query), match_service_types_vector(query))
+
+    try:
+        query_vector = await asyncio.wait_for(
+            asyncio.to_thread(embeddings_svc.get_embeddings().embed_query, query),
+            timeout=5.0,
+        )
+    except (asyncio.TimeoutError, Exception):
+        logger.warning("Query embedding failed — falling back to text-only", exc_info=True)
+        return await match_service_types_text(query), []
+
+    pipeline = [
+        *_text_search_pipeline(query),
+        {"$addFields": {"match_source": {"$literal": "text"}}},
+        {
+            "$unionWith": {
+                "coll": "service_types",
+                "pipeline": [
+                    {
+                        "$vectorSearch": {
+                            "index": VECTOR_INDEX_NAME,
+                            "path": "embedding",
+                            "queryVector": query_vector,
+                            "numCandidates": 100,
+                            "limit": 10,
+                        }
+                    },
+                    {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
+                    {"$match": {"score": {"$gte": VECTOR_SCORE_THRESHOLD}}},
+                    {"$project": {"slug": 1, "name": 1, "score": 1, "match_source": {"$literal": "vector"}}},
+                ],
+            }
+        },
+    ]
+    text_matches: list[MatchedServiceType] = []
+    vector_matches: list[MatchedServiceType] = []
+    try:
+        async for doc in get_db().service_types.aggregate(pipeline, maxTimeMS=5000):
+            match = MatchedServiceType(
+                slug=doc["slug"],
+                name=doc["name"],
+                match_source=doc["match_source"],
+                score=doc["score"],
+            )
+            (text_matches if match.match_source == "text" else vector_matches).append(match)
+    except OperationFailure as exc:
+        if _is_unsupported_stage(exc):
+            logger.warning(
+                "Combined text/vector search rejected — using separate searches from now on",
+                exc_info=True,
+            )
+            _union_search_supported = False
+        else:
+            logger.warning("Combined text/vector search failed — using separate searches", exc_info=True)
+        return await asyncio.gather(match_service_types_text(query), match_service_types_vector(query))
+    return text_matches, vector_matches
+
+
 def _merge_service_types(
     text_matches: list[MatchedServiceType],
     vector_matches: list[MatchedServiceType],
@@ -133,37 +286,62 @@ def _merge_service_types(
     return sorted(by_slug.values(), key=lambda m: m.score, reverse=True)
 
 
-async def find_providers_with_prices(
+def _provider_from_doc(
+    doc: dict,
+    distance_meters: float,
+    observations: list[dict] | None = None,
+) -> ProviderWithPrices:
+    """Build a ProviderWithPrices from a stored provider document.
+
+    Documents come from our own collections, so the models are assembled with
+    model_construct instead of being re-validated field by field.
+    """
+    loc = doc["location"]
+    category = doc.get("category") or ""
+    provider = ProviderWithPrices.model_construct(
+        id=str(doc["_id"]),
+        name=doc["name"],
+        category=category,
+        category_label=doc.get("category_label") or category.replace("_", " ").title(),
+        address=doc.get("address") or "",
+        city=doc.get("city") or "",
+        location=GeoJSONPoint.model_construct(
+            type=loc.get("type", "Point"), coordinates=tuple(loc["coordinates"])
+        ),
+        distance_meters=float(distance_meters),
+        rating=doc.get("rating"),
+        review_count=doc.get("review_count"),
+        description=doc.get("description"),
+        website=doc.get("website"),
+        observations=[
+            ObservationSummary.model_construct(**{**o, "price": float(o["price"])})
+            for o in observations or ()
+        ],
+    )
+    provider._oid = doc["_id"]
+    return provider
+
+
+def _priced_providers_pipeline(
     service_type_slugs: list[str],
     lat: float,
     lng: float,
     radius_meters: float,
-) -> list[ProviderWithPrices]:
-    """Geo query on observations, grouped by provider with a $lookup."""
-    db = get_db()
-    pipeline = [
+) -> list[dict]:
+    return [
         {
             "$geoNear": {
                 "near": {"type": "Point", "coordinates": [lng, lat]},
+                "key": "location",
                 "distanceField": "distance_meters",
                 "maxDistance": radius_meters,
                 "query": {"service_type": {"$in": service_type_slugs}},
                 "spherical": True,
             }
         },
-        {
-            "$lookup": {
-                "from": "providers",
-                "localField": "provider_id",
-                "foreignField": "_id",
-                "as": "provider",
-            }
-        },
-        {"$unwind": "$provider"},
         {
             "$group": {
                 "_id": "$provider_id",
-                "provider": {"$first": "$provider"},
                 "observations": {
                     "$push": {
                         "service_type": "$service_type",
@@ -178,43 +356,45 @@ async def find_providers_with_prices(
         },
         {"$sort": {"distance_meters": 1}},
         {"$limit": 50},
+        # Join after grouping so the lookup runs once per provider, not per observation.
+        {
+            "$lookup": {
+                "from": "providers",
+                "localField": "_id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": _PROVIDER_PROJECTION}, *_CATEGORY_LABEL_STAGES],
+                "as": "provider",
+            }
+        },
+        {"$unwind": "$provider"},
     ]
 
+
+async def find_providers_with_prices(
+    service_type_slugs: list[str],
+    lat: float,
+    lng: float,
+    radius_meters: float,
+) -> list[ProviderWithPrices]:
+    """Geo query on observations, grouped by provider, then joined with $lookup."""
+    db = get_db()
+    pipeline = _priced_providers_pipeline(service_type_slugs, lat, lng, radius_meters)
+
     results: list[ProviderWithPrices] = []
-    async for doc in db.observations.aggregate(pipeline, maxTimeMS=4000):
-        p = doc["provider"]
+    async for doc in db.observations.aggregate(pipeline, maxTimeMS=4000, batchSize=50):
         results.append(
-            ProviderWithPrices(
-                id=str(p["_id"]),
-                name=p["name"],
-                category=p["category"],
-                address=p["address"],
-                city=p.get("city", ""),
-                location=p["location"],
-                distance_meters=doc["distance_meters"],
-                rating=p.get("rating"),
-                review_count=p.get("review_count"),
-                description=p.get("description"),
-                website=p.get("website"),
-                observations=[ObservationSummary(**o) for o in doc["observations"]],
-            )
+            _provider_from_doc(doc["provider"], doc["distance_meters"], doc["observations"])
         )
     return results
 
 
-async def find_providers_by_category(
+def _category_providers_pipeline(
     service_type_slugs: list[str],
     lat: float,
     lng: float,
     radius_meters: float,
-) -> list[ProviderWithPrices]:
-    """Geo query directly on providers by category (service-type slug).
-
-    Used as a fallback when no observations exist yet — e.g. providers
-    were discovered via SerpAPI but have no price observations.
-    """
-    db = get_db()
-    pipeline = [
+) -> list[dict]:
+    return [
         {
             "$geoNear": {
                 "near": {"type": "Point", "coordinates": [lng, lat]},
@@ -226,28 +406,103 @@ async def find_providers_by_category(
         },
         {"$sort": {"distance_meters": 1}},
         {"$limit": 50},
+        {"$project": {**_PROVIDER_PROJECTION, "distance_meters": 1}},
+        *_CATEGORY_LABEL_STAGES,
     ]
 
+
+async def find_providers_by_category(
+    service_type_slugs: list[str],
+    lat: float,
+    lng: float,
+    radius_meters: float,
+) -> list[ProviderWithPrices]:
+    """Geo query directly on providers by category (service-type slug).
+
+    Used as a fallback when no observations exist yet — e.g. providers
+    were discovered via SerpAPI but have no price observations.
+    """
+    db = get_db()
+    pipeline = _category_providers_pipeline(service_type_slugs, lat, lng, radius_meters)
+
     results: list[ProviderWithPrices] = []
-    async for doc in db.providers.aggregate(pipeline, maxTimeMS=4000):
-        results.append(
-            ProviderWithPrices(
-                id=str(doc["_id"]),
-                name=doc["name"],
-                category=doc.get("category") or "",
-                address=doc.get("address") or "",
-                city=doc.get("city") or "",
-                location=doc["location"],
-                distance_meters=doc.get("distance_meters", 0),
-                rating=doc.get("rating"),
-                review_count=doc.get("review_count"),
-                description=doc.get("description"),
-                website=doc.get("website"),
-            )
-        )
+    async for doc in db.providers.aggregate(pipeline, maxTimeMS=4000, batchSize=50):
+        results.append(_provider_from_doc(doc, doc.get("distance_meters", 0)))
     return results
 
 
+_union_geo_supported = True
+
+
+async def find_nearby_providers(
+    service_type_slugs: list[str],
+    lat: float,
+    lng: float,
+    radius_meters: float,
+) -> list[ProviderWithPrices]:
+    """Priced providers, then unpriced ones in the matched categories, nearest first.
+
+    Both geo queries run in one aggregation ($unionWith) and are deduplicated
+    server-side, a provider with observations winning over its bare entry.
+    Falls back to the two separate queries for a call whose combined pipeline
+    fails, and permanently once the cluster rejects it as unsupported.
+    """
+    global _union_geo_supported
+    if _union_geo_supported:
+        pipeline = [
+            *_priced_providers_pipeline(service_type_slugs, lat, lng, radius_meters),
+            {"$addFields": {"priced": {"$literal": 1}}},
+            {
+                "$unionWith": {
+                    "coll": "providers",
+                    "pipeline": [
+                        *_category_providers_pipeline(service_type_slugs, lat, lng, radius_meters),
+                        {
+                            "$project": {
+                                "distance_meters": 1,
+                                "provider": "$$ROOT",
+                                "observations": {"$literal": []},
+                                "priced": {"$literal": 0},
+                            }
+                        },
+                    ],
+                }
+            },
+            {"$sort": {"priced": -1}},
+            {
+                "$group": {
+                    "_id": "$_id",
+                    "provider": {"$first": "$provider"},
+                    "observations": {"$first": "$observations"},
+                    "distance_meters": {"$first": "$distance_meters"},
+                    "priced": {"$first": "$priced"},
+                }
+            },
+            {"$sort": {"priced": -1, "distance_meters": 1}},
+        ]
+        try:
+            return [
+                _provider_from_doc(doc["provider"], doc["distance_meters"], doc["observations"])
+                async for doc in get_db().observations.aggregate(pipeline, maxTimeMS=4000, batchSize=100)
+            ]
+        except OperationFailure as exc:
+            if _is_unsupported_stage(exc):
+                logger.warning(
+                    "Combined provider geo query rejected — using separate queries from now on",
+                    exc_info=True,
+                )
+                _union_geo_supported = False
+            else:
+                logger.warning("Combined provider geo query failed — using separate queries", exc_info=True)
+
+    priced, unpriced = await asyncio.gather(
+        find_providers_with_prices(service_type_slugs, lat, lng, radius_meters),
+        find_providers_by_category(service_type_slugs, lat, lng, radius_meters),
+    )
+    seen_ids = {p.id for p in priced}
+    return priced + [p for p in unpriced if p.id not in seen_ids]
+
+
 async def find_providers_by_ids(
     provider_ids: list,
     lat: float,
@@ -258,107 +513,57 @@ async def find_providers_by_ids(
     if not provider_ids:
         return []
     db = get_db()
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": "distance_meters",
+        "query": {"_id": {"$in": provider_ids}},
+        "spherical": True,
+    }
+    if radius_meters is not None:
+        geo_near["maxDistance"] = radius_meters
     pipeline = [
-        {"$match": {"_id": {"$in": provider_ids}}},
-        {
-            "$addFields": {
-                "distance_meters": {
-                    "$let": {
-                        "vars": {
-                            "coords": "$location.coordinates",
-                            "refLng": lng,
-                            "refLat": lat,
-                        },
-                        "in": {
-                            "$multiply": [
-                                6371000,
-                                {
-                                    "$acos": {
-                                        "$min": [
-                                            1.0,
-                                            {
-                                                "$add": [
-                                                    {
-                                                        "$multiply": [
-                                                            {"$sin": {"$degreesToRadians": lat}},
-                                                            {"$sin": {"$degreesToRadians": {"$arrayElemAt": ["$$coords", 1]}}},
-                                                        ]
-                                                    },
-                                                    {
-                                                        "$multiply": [
-                                                            {"$cos": {"$degreesToRadians": lat}},
-                                                            {"$cos": {"$degreesToRadians": {"$arrayElemAt": ["$$coords", 1]}}},
-                                                            {"$cos": {"$degreesToRadians": {"$subtract": [{"$arrayElemAt": ["$$coords", 0]}, lng]}}},
-                                                        ]
-                                                    },
-                                                ]
-                                            },
-                                        ]
-                                    }
-                                },
-                            ]
-                        },
-                    }
-                }
-            }
-        },
-        *(
-            [{"$match": {"distance_meters": {"$lte": radius_meters}}}]
-            if radius_meters is not None
-            else []
-        ),
-        {"$sort": {"distance_meters": 1}},
+        {"$geoNear": geo_near},
         {"$limit": 50},
+        {"$project": {**_PROVIDER_PROJECTION, "distance_meters": 1}},
+        *_CATEGORY_LABEL_STAGES,
     ]
 
     results: list[ProviderWithPrices] = []
-    async for doc in db.providers.aggregate(pipeline, maxTimeMS=4000):
-        results.append(
-            ProviderWithPrices(
-                id=str(doc["_id"]),
-                name=doc["name"],
-                category=doc.get("category") or "",
-                address=doc.get("address") or "",
-                city=doc.get("city") or "",
-                location=doc["location"],
-                distance_meters=doc.get("distance_meters", 0),
-                rating=doc.get("rating"),
-                review_count=doc.get("review_count"),
-                description=doc.get("description"),
-                website=doc.get("website"),
-            )
-        )
+    async for doc in db.providers.aggregate(pipeline, maxTimeMS=4000, batchSize=50):
+        results.append(_provider_from_doc(doc, doc.get("distance_meters", 0)))
     return results
 
 
+# Structured-output schema for _resolve_intent (a docstring would be sent to the model).
+class _SearchIntent(BaseModel):
+    name: str
+    slug: str
+    relevant_slugs: list[str]
+
+
 _INTENT_PROMPT = (
-    "You are a service-type matching assistant. Given a user's search query and a list of "
-    "existing service types, you must:\n"
-    "1. Extract a short, canonical service-type name (2-6 words) from the query. "
-    "Remove filler words. Keep specific product/model identifiers.\n"
-    "2. Determine which existing service types (if any) are relevant to this query.\n\n"
-    "Matching rules:\n"
-    "- Different brands/models/product lines must NOT match "
-    "(e.g. iPhone ≠ Galaxy, BMW ≠ Toyota).\n"
-    "- Generic types without a specific model (e.g. 'Screen Repair') DO match "
-    "any specific query in that category.\n"
-    "- Types for the same brand family DO match "
-    "(e.g. 'Galaxy Note 10' is relevant for a 'Galaxy' query).\n\n"
-    'Reply with ONLY a JSON object: {"name": "<condensed name>", "relevant_slugs": ["slug1", ...]}\n'
-    "If no existing types are relevant, return an empty array for relevant_slugs."
+    "Condense the user's query into a canonical service-type name (2-6 words, no filler, "
+    "keep product/model identifiers). List the existing service types relevant to it in "
+    "relevant_slugs, and set slug to the one that is exactly the condensed name, or \"\".\n"
+    "Different brands/models/product lines do NOT match (iPhone ≠ Galaxy, BMW ≠ Toyota). "
+    "Generic types without a model (e.g. 'Screen Repair') DO match any specific query in "
+    "that category. Types in the same brand family DO match ('Galaxy Note 10' for 'Galaxy')."
 )
 
 
 async def _resolve_intent(
     query: str,
     candidates: list[MatchedServiceType],
-) -> tuple[str, list[MatchedServiceType]]:
+) -> tuple[str, str, list[MatchedServiceType]]:
     """Single LLM call that condenses the query AND validates candidate matches.
 
-    Returns (condensed_name, validated_candidates).
+    Returns (condensed_name, condensed_slug, validated_candidates). The slug is
+    taken from the LLM only when it names one of the validated candidates;
+    otherwise it is derived from the condensed name.
     """
     if not settings.openai_api_key:
-        return query.strip().title(), candidates
+        name = query.strip().title()
+        return name, name_to_slug(name), candidates
 
     slug_map = {m.slug: m for m in candidates}
     if candidates:
@@ -370,48 +575,51 @@ async def _resolve_intent(
     user_msg = f'User query: "{query}"{candidates_block}'
 
     try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        resp = await client.chat.completions.create(
+        client = get_openai_client()
+        resp = await client.chat.completions.parse(
             model="gpt-4o-mini",
             temperature=0,
             max_tokens=200,
             timeout=10.0,
+            response_format=_SearchIntent,
             messages=[
                 {"role": "system", "content": _INTENT_PROMPT},
                 {"role": "user", "content": user_msg},
             ],
         )
-        content = resp.choices[0].message.content.strip()
-        parsed = json.loads(content)
-        condensed_name = parsed["name"]
-        valid_slugs = set(parsed.get("relevant_slugs", []))
+        parsed = resp.choices[0].message.parsed
+        condensed_name = parsed.name
+        valid_slugs = set(parsed.relevant_slugs)
         validated = [slug_map[s] for s in valid_slugs if s in slug_map]
+        condensed_slug = parsed.slug
+        if condensed_slug not in valid_slugs or condensed_slug not in slug_map:
+            condensed_slug = name_to_slug(condensed_name)
         logger.info(
             "Resolved intent for %r: name=%r, kept %d/%d slugs %s",
             query, condensed_name, len(validated), len(candidates),
             [m.slug for m in validated],
         )
-        return condensed_name, validated
+        return condensed_name, condensed_slug, validated
     except Exception:
         logger.warning("Intent resolution failed, using raw query", exc_info=True)
-        return query.strip().title(), candidates
+        name = query.strip().title()
+        return name, name_to_slug(name), candidates
 
 
-async def _fetch_provider_docs(provider_ids: list[str]) -> list[dict]:
+async def _fetch_provider_docs(provider_oids: list[ObjectId]) -> list[dict]:
     """Fetch raw provider documents by ID, including the website field."""
-    if not provider_ids:
+    if not provider_oids:
         return []
     db = get_db()
-    oids = [ObjectId(pid) for pid in provider_ids]
     docs = []
-    async for doc in db.providers.find({"_id": {"$in": oids}}):
+    async for doc in db.providers.find({"_id": {"$in": provider_oids}}):
         docs.append(doc)
     return docs
 
 
-def _providers_needing_scrape(providers: list[ProviderWithPrices]) -> list[str]:
+def _providers_needing_scrape(providers: list[ProviderWithPrices]) -> list[ObjectId]:
     """Return IDs of providers that have no observations (i.e. no prices yet)."""
-    return [p.id for p in providers if not p.observations]
+    return [p.oid for p in providers if not p.observations]
 
 
 async def _enrich_with_scraped_prices(
@@ -448,20 +656,18 @@ async def _enrich_with_scraped_prices(
 
 async def _resolve_inquiry_statuses(providers: list[ProviderWithPrices]) -> None:
     """Look up pending/replied inquiries and set inquiry_status on each provider."""
-    provider_ids = [ObjectId(p.id) for p in providers]
+    provider_ids = [p.oid for p in providers]
     if not provider_ids:
         return
 
     db = get_db()
+    # "replied" sorts after "sent", so $max applies the replied-wins precedence.
     status_map: dict[str, str] = {}
-    async for doc in db.inquiries.find(
-        {"provider_id": {"$in": provider_ids}, "status": {"$in": ["sent", "replied"]}},
-        {"provider_id": 1, "status": 1},
-    ):
-        pid = str(doc["provider_id"])
-        current = status_map.get(pid)
-        if doc["status"] == "replied" or current is None:
-            status_map[pid] = doc["status"]
+    async for doc in db.inquiries.aggregate([
+        {"$match": {"provider_id": {"$in": provider_ids}, "status": {"$in": ["sent", "replied"]}}},
+        {"$group": {"_id": "$provider_id", "status": {"$max": "$status"}}},
+    ]):
+        status_map[str(doc["_id"])] = doc["status"]
 
     for p in providers:
         p.inquiry_status = status_map.get(p.id, "none")
@@ -481,20 +687,15 @@ def _mad_outlier_prices(values: list[float]) -> set[float]:
 
     Returns the set of prices that are outliers (modified |Z| > threshold).
     """
-    log_v = [math.log(v) for v in values]
-    med = statistics.median(log_v)
-    abs_devs = [abs(lv - med) for lv in log_v]
-    mad = statistics.median(abs_devs)
+    arr = np.asarray(values, dtype=np.float64)
+    abs_devs = np.abs(np.log(arr) - np.median(np.log(arr)))
+    mad = np.median(abs_devs)
 
     if mad == 0:
         return set()
 
-    outliers: set[float] = set()
-    for v, lv in zip(values, log_v):
-        z = 0.6745 * abs(lv - med) / mad
-        if z > MAD_Z_THRESHOLD:
-            outliers.add(v)
-    return outliers
+    z = 0.6745 * abs_devs / mad
+    return set(arr[z > MAD_Z_THRESHOLD].tolist())
 
 
 def _filter_price_outliers(providers: list[ProviderWithPrices]) -> int:
@@ -506,9 +707,9 @@ def _filter_price_outliers(providers: list[ProviderWithPrices]) -> int:
     """
     lowest_by_provider: dict[str, float] = {}
     for p in providers:
-        with_price = [o for o in p.observations if o.price > 0]
-        if with_price:
-            lowest_by_provider[p.id] = min(o.price for o in with_price)
+        lowest = min((o.price for o in p.observations if o.price > 0), default=None)
+        if lowest is not None:
+            lowest_by_provider[p.id] = lowest
 
     if len(lowest_by_provider) < MIN_SAMPLE_FOR_OUTLIER_FILTER:
         return 0
@@ -517,11 +718,17 @@ def _filter_price_outliers(providers: list[ProviderWithPrices]) -> int:
     if not bad_prices:
         return 0
 
+    # Outliers are always positive, so non-positive prices never match the set.
     removed = 0
     for p in providers:
-        before = len(p.observations)
-        p.observations = [o for o in p.observations if o.price <= 0 or o.price not in bad_prices]
-        removed += before - len(p.observations)
+        if p.id not in lowest_by_provider:
+            continue
+        obs = p.observations
+        if not any(o.price in bad_prices for o in obs):
+            continue
+        kept = [o for o in obs if o.price not in bad_prices]
+        removed += len(obs) - len(kept)
+        obs[:] = kept
 
     if removed:
         logger.info(
@@ -533,42 +740,31 @@ def _filter_price_outliers(providers: list[ProviderWithPrices]) -> int:
 
 def _compute_price_stats(providers: list[ProviderWithPrices]) -> PriceStats | None:
     """Compute aggregate price statistics from the lowest price per provider."""
-    prices: list[tuple[float, str]] = []
+    values: list[float] = []
+    currencies: list[str] = []
     for p in providers:
-        with_price = [o for o in p.observations if o.price > 0]
-        if with_price:
-            lowest = min(with_price, key=lambda o: o.price)
-            prices.append((lowest.price, lowest.currency))
+        lowest = min((o for o in p.observations if o.price > 0), key=lambda o: o.price, default=None)
+        if lowest is not None:
+            values.append(lowest.price)
+            currencies.append(lowest.currency)
 
-    if not prices:
+    if not values:
         return None
 
-    values = [p for p, _ in prices]
-    currency = max(set(c for _, c in prices), key=lambda c: sum(1 for _, cc in prices if cc == c))
+    arr = np.fromiter(values, dtype=np.float64, count=len(values))
+    currency = Counter(currencies).most_common(1)[0][0]
 
     return PriceStats(
-        avg_price=round(statistics.mean(values), 2),
-        min_price=round(min(values), 2),
-        max_price=round(max(values), 2),
-        median_price=round(statistics.median(values), 2),
+        avg_price=round(float(arr.mean()), 2),
+        min_price=round(float(arr.min()), 2),
+        max_price=round(float(arr.max()), 2),
+        median_price=round(float(np.median(arr)), 2),
         currency=currency,
         sample_size=len(values),
     )
 
 
-async def _resolve_category_labels(providers: list[ProviderWithPrices]) -> None:
-    """Look up service_types by slug and set category_label on each provider."""
-    slugs = list({p.category for p in providers})
-    if not slugs:
-        return
-
-    db = get_db()
-    slug_to_name: dict[str, str] = {}
-    async for doc in db.service_types.find({"slug": {"$in": slugs}}, {"slug": 1, "name": 1}, max_time_ms=4000):
-        slug_to_name[doc["slug"]] = doc["name"]
-
-    for p in providers:
-        p.category_label = slug_to_name.get(p.category, p.category.replace("_", " ").title())
+_inflight_searches: dict[tuple, asyncio.Task] = {}
 
 
 async def search(
@@ -577,18 +773,37 @@ async def search(
     lng: float,
     radius_meters: float,
 ) -> SearchResponse:
-    """Run text + vector search, find nearby providers, trigger discovery if empty."""
+    """Run text + vector search, find nearby providers, trigger discovery if empty.
 
-    asyncio.create_task(_check_replies_background())
+    Identical searches (same query, ~100 m location, radius) that arrive while
+    one is in flight share its result instead of repeating the work.
+    """
+    key = (query.strip().lower(), round(lat, 3), round(lng, 3), radius_meters)
+    task = _inflight_searches.get(key)
+    if task is None:
+        task = asyncio.create_task(_search(query, lat, lng, radius_meters))
+        _inflight_searches[key] = task
+        task.add_done_callback(lambda _: _inflight_searches.pop(key, None))
+    # Shielded so one caller disconnecting doesn't cancel the search for the others.
+    return await asyncio.shield(task)
 
-    text_matches, vector_matches = await asyncio.gather(
-        match_service_types_text(query),
-        match_service_types_vector(query),
-    )
+
+async def _search(
+    query: str,
+    lat: float,
+    lng: float,
+    radius_meters: float,
+) -> SearchResponse:
+
+    text_matches, vector_matches = await match_service_types(query)
     merged = _merge_service_types(text_matches, vector_matches)
 
-    condensed_name, validated = await _resolve_intent(query, merged)
-    condensed_slug = name_to_slug(condensed_name)
+    if len(merged) == 1 and any(
+        m.slug == merged[0].slug and m.score >= INTENT_SKIP_SCORE for m in vector_matches
+    ):
+        condensed_name, condensed_slug, validated = merged[0].name, merged[0].slug, merged
+    else:
+        condensed_name, condensed_slug, validated = await _resolve_intent(query, merged)
 
     validated_slugs = {m.slug for m in validated}
     if condensed_slug not in validated_slugs:
@@ -611,12 +826,7 @@ async def search(
 
     providers: list[ProviderWithPrices] = []
     if slugs:
-        priced, unpriced = await asyncio.gather(
-            find_providers_with_prices(slugs, lat, lng, radius_meters),
-            find_providers_by_category(slugs, lat, lng, radius_meters),
-        )
-        seen_ids = {p.id for p in priced}
-        providers = priced + [p for p in unpriced if p.id not in seen_ids]
+        providers = await find_nearby_providers(slugs, lat, lng, radius_meters)
 
     discovery_triggered = False
     if not providers:
@@ -637,16 +847,17 @@ async def search(
     scraping_in_progress = False
     if providers:
         primary_slug = slugs[0] if slugs else condensed_slug
-        await asyncio.gather(
-            _resolve_category_labels(providers),
-            _resolve_inquiry_statuses(providers),
-        )
+        await _resolve_inquiry_statuses(providers)
         needs_scrape = {p.id for p in providers if not p.observations}
-        new_to_scrape = needs_scrape - _scraping_provider_ids - _scrape_done_ids
+        new_to_scrape = {
+            pid for pid in needs_scrape - _scraping_provider_ids if pid not in _scrape_done_ids
+        }
         if new_to_scrape:
-            asyncio.create_task(
+            task = asyncio.create_task(
                 _scrape_prices_background(providers, query, primary_slug)
             )
+            _scrape_tasks.add(task)
+            task.add_done_callback(_scrape_tasks.discard)
         currently_scraping = needs_scrape & _scraping_provider_ids
         if new_to_scrape or currently_scraping:
             scraping_in_progress = True
@@ -670,9 +881,12 @@ async def _scrape_prices_background(
     service_type_slug: str,
 ) -> None:
     """Fire-and-forget task that scrapes prices for providers missing observations."""
-    ids = {p.id for p in providers if not p.observations}
-    ids.difference_update(_scraping_provider_ids)
-    ids.difference_update(_scrape_done_ids)
+    ids = {
+        p.id for p in providers
+        if not p.observations
+        and p.id not in _scraping_provider_ids
+        and p.id not in _scrape_done_ids
+    }
     if not ids:
         return
     _scraping_provider_ids.update(ids)
@@ -684,12 +898,3 @@ async def _scrape_prices_background(
         _scraping_provider_ids.difference_update(ids)
         _scrape_done_ids.update(ids)
 
-
-async def _check_replies_background() -> None:
-    """Fire-and-forget task that checks for email replies."""
-    try:
-        count = await check_for_replies()
-        if count > 0:
-            logger.info("Processed %d email replies during search", count)
-    except Exception:
-        logger.warning("Background reply check failed", exc_info=True)
@@ -1,12 +1,34 @@
-import asyncio
 import logging
 
-from serpapi import GoogleSearch
+import httpx
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+SERPAPI_URL = "https://serpapi.com/search.json"
+_HTTPX_TIMEOUT = httpx.Timeout(connect=4, read=10, write=4, pool=4)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=_HTTPX_TIMEOUT,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 RADIUS_TO_ZOOM = [
     (500, 18),
     (1500, 16),
@@ -24,17 +46,7 @@ def _radius_to_zoom(radius_meters: float) -> int:
     return 11
 
 
-def _search_maps_sync(query: str, lat: float, lng: float, zoom: int) -> list[dict]:
-    params = {
-        "engine": "google_maps",
-        "q": query,
-        "ll": f"@{lat},{lng},{zoom}z",
-        "type": "search",
-        "api_key": settings.serpapi_key,
-    }
-
-    results = GoogleSearch(params).get_dict()
-
+def _parse_local_results(results: dict) -> list[dict]:
     businesses = []
     for place in results.get("local_results", []):
         gps = place.get("gps_coordinates", {})
@@ -63,10 +75,21 @@ async def search_maps(
     lng: float,
     radius_meters: float = 5000,
 ) -> list[dict]:
-    """Search Google Maps via SerpAPI. Runs the blocking HTTP call in a thread."""
+    """Search Google Maps via SerpAPI over a shared keep-alive HTTP client."""
     zoom = _radius_to_zoom(radius_meters)
     logger.info(
         "SerpAPI search: query=%r lat=%s lng=%s zoom=%s (radius=%sm)",
         query, lat, lng, zoom, radius_meters,
     )
-    return await asyncio.to_thread(_search_maps_sync, query, lat, lng, zoom)
+    params = {
+        "engine": "google_maps",
+        "q": query,
+        "ll": f"@{lat},{lng},{zoom}z",
+        "type": "search",
+        "api_key": settings.serpapi_key,
+    }
+    resp = await _get_http_client().get(SERPAPI_URL, params=params)
+    results = resp.json()
+    if "error" in results:
+        logger.warning("SerpAPI error for query=%r: %s", query, results["error"])
+    return _parse_local_results(results)
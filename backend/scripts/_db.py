@@ -0,0 +1,40 @@
+"""
+Shared MongoDB handles for the maintenance scripts.
+
+Each script process gets at most one bounded client per driver (pymongo for the
+sync scripts, Motor for seeding), created on first use and closed at exit.
+"""
+
+import atexit
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+from app.config import settings
+
+_POOL_OPTIONS = {"maxPoolSize": 10, "minPoolSize": 2}
+
+_client: MongoClient | None = None
+_async_client: AsyncIOMotorClient | None = None
+
+
+def get_db():
+    global _client
+    if _client is None:
+        _client = MongoClient(settings.mongo_url, **_POOL_OPTIONS)
+    return _client[settings.mongo_db]
+
+
+def get_async_db():
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncIOMotorClient(settings.mongo_url, **_POOL_OPTIONS)
+    return _async_client[settings.mongo_db]
+
+
+@atexit.register
+def _close_clients():
+    if _client is not None:
+        _client.close()
+    if _async_client is not None:
+        _async_client.close()
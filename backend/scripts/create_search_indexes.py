@@ -6,23 +6,28 @@ Usage (from backend/):
 
 Requires a MongoDB Atlas cluster (indexes are not available on local mongod).
 The script is idempotent — it skips indexes that already exist.
+
+The vector index ranks by dotProduct, which requires unit-length embeddings;
+run scripts.normalize_embeddings once for data embedded before that change (it
+also repacks array embeddings as float32 binData), and drop and recreate an
+existing cosine index to switch it over.
 """
 
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-from pymongo import MongoClient
 from pymongo.operations import SearchIndexModel
 
-from app.config import settings
 from app.services.embeddings import EMBEDDING_DIMENSIONS
+from scripts._db import get_db
 
 TEXT_INDEX_NAME = "service_types_text"
 VECTOR_INDEX_NAME = "service_types_vector"
 
 
 def create_indexes():
-    client = MongoClient(settings.mongo_url)
-    db = client[settings.mongo_db]
+    db = get_db()
     collection = db.service_types
 
     existing = {idx["name"] for idx in collection.list_search_indexes()}
@@ -59,7 +64,7 @@ def create_indexes():
                         "type": "vector",
                         "path": "embedding",
                         "numDimensions": EMBEDDING_DIMENSIONS,
-                        "similarity": "cosine",
+                        "similarity": "dotProduct",
                     }
                 ]
             },
@@ -72,19 +77,24 @@ def create_indexes():
     print("\nWaiting for indexes to become ready (this may take a minute on Atlas)...")
     _wait_for_indexes(collection, {TEXT_INDEX_NAME, VECTOR_INDEX_NAME})
     print("Done — all indexes ready.")
-    client.close()
+
+
+def _index_ready(collection, name: str) -> bool:
+    return any(idx.get("status") == "READY" for idx in collection.list_search_indexes(name=name))
 
 
 def _wait_for_indexes(collection, expected_names: set[str], timeout: int = 120):
     deadline = time.time() + timeout
-    while time.time() < deadline:
-        ready = set()
-        for idx in collection.list_search_indexes():
-            if idx["name"] in expected_names and idx.get("status") == "READY":
-                ready.add(idx["name"])
-        if ready == expected_names:
-            return
-        time.sleep(5)
+    pending = set(expected_names)
+    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+        while time.time() < deadline:
+            names = sorted(pending)
+            for name, ready in zip(names, pool.map(partial(_index_ready, collection), names)):
+                if ready:
+                    pending.discard(name)
+            if not pending:
+                return
+            time.sleep(1)
     print("  ⚠ Timed out waiting — indexes may still be building on Atlas.")
 
 
@@ -5,45 +5,132 @@ Usage (from backend/):
     python -m scripts.embed_service_types
 
 Requires OPENAI_API_KEY to be set in .env.
+
+Vectors are also kept in an embedding_cache collection keyed by a hash of the
+model and text, so texts embedded before — by this script or a previous seed
+run, which shares the cache — are not sent to OpenAI again.
 """
 
-from pymongo import MongoClient
+import asyncio
+import hashlib
 
-from app.config import settings
-from app.services.embeddings import build_search_text, get_embeddings
+from bson.binary import Binary
+from pymongo import UpdateOne
 
+from app.services.embeddings import (
+    EMBEDDING_MODEL,
+    batched_texts,
+    build_search_text,
+    get_embeddings,
+    to_bson_vector,
+)
+from scripts._db import get_async_db
 
-def embed_service_types():
-    client = MongoClient(settings.mongo_url)
-    db = client[settings.mongo_db]
-    collection = db.service_types
+# Documents fetched, embedded and written per round, bounding memory for large backfills.
+_BATCH_SIZE = 256
 
-    docs = list(collection.find({"embedding": {"$exists": False}}))
-    if not docs:
-        print("All service types already have embeddings — nothing to do.")
-        client.close()
+
+def text_hash(text: str) -> str:
+    """Cache key for an embedding: the model plus the exact text embedded."""
+    return hashlib.sha256(f"{EMBEDDING_MODEL}\0{text}".encode()).hexdigest()
+
+
+async def resolve_vectors(db, texts: list[str]) -> tuple[list[str], dict[str, Binary], list[str]]:
+    """Resolve vectors for texts: embedding_cache hits first, then embed the misses.
+
+    Returns (hashes, vectors_by_hash, new_hashes); pass the last two to
+    cache_vectors once the vectors are stored.
+    """
+    hashes = [text_hash(t) for t in texts]
+
+    vectors_by_hash = {
+        c["_id"]: c["vector"]
+        async for c in db.embedding_cache.find({"_id": {"$in": list(set(hashes))}})
+    }
+    missing = {h: t for h, t in zip(hashes, texts) if h not in vectors_by_hash}
+    print(f"  {len(vectors_by_hash)} found in the embedding cache, {len(missing)} to embed.")
+
+    if missing:
+        embeddings_model = get_embeddings()
+        batches = await asyncio.gather(*(
+            asyncio.to_thread(embeddings_model.embed_documents, batch)
+            for batch in batched_texts(list(missing.values()))
+        ))
+        fresh = [vec for batch in batches for vec in batch]
+        vectors_by_hash.update(zip(missing, map(to_bson_vector, fresh)))
+    return hashes, vectors_by_hash, list(missing)
+
+
+async def cache_vectors(db, vectors_by_hash: dict[str, Binary], new_hashes: list[str]) -> None:
+    if not new_hashes:
         return
+    await db.embedding_cache.bulk_write(
+        [
+            UpdateOne({"_id": h}, {"$set": {"vector": vectors_by_hash[h]}}, upsert=True)
+            for h in new_hashes
+        ],
+        ordered=False,
+    )
 
-    print(f"Generating embeddings for {len(docs)} service types...")
 
+async def _embed_batch(db, docs: list[dict]) -> tuple[list[dict], list[str], dict[str, Binary], list[str]]:
     texts = [
         build_search_text(d["name"], d["category"], d.get("description"))
         for d in docs
     ]
+    return docs, *await resolve_vectors(db, texts)
+
+
+async def _write_batch(
+    db,
+    docs: list[dict],
+    hashes: list[str],
+    vectors_by_hash: dict[str, Binary],
+    new_hashes: list[str],
+) -> None:
+    await asyncio.gather(
+        db.service_types.bulk_write(
+            [
+                UpdateOne({"_id": doc["_id"]}, {"$set": {"embedding": vectors_by_hash[h]}})
+                for doc, h in zip(docs, hashes)
+            ],
+            ordered=False,
+        ),
+        cache_vectors(db, vectors_by_hash, new_hashes),
+    )
+    print("\n".join(f"  ✓ {doc['slug']}" for doc in docs))
+
 
-    embeddings_model = get_embeddings()
-    vectors = embeddings_model.embed_documents(texts)
+async def embed_service_types():
+    db = get_async_db()
+    cursor = db.service_types.find(
+        {"embedding": {"$exists": False}},
+        {"name": 1, "category": 1, "description": 1, "slug": 1},
+        batch_size=_BATCH_SIZE,
+    )
+    # Batch N is written while batch N+1 is being embedded.
+    ready: asyncio.Queue = asyncio.Queue(maxsize=2)
 
-    for doc, vector in zip(docs, vectors):
-        collection.update_one(
-            {"_id": doc["_id"]},
-            {"$set": {"embedding": vector}},
-        )
-        print(f"  ✓ {doc['slug']}")
+    async def embed_all():
+        while docs := await cursor.to_list(_BATCH_SIZE):
+            print(f"Generating embeddings for {len(docs)} service types...")
+            await ready.put(await _embed_batch(db, docs))
+        await ready.put(None)
 
-    print(f"Done — {len(docs)} embeddings stored.")
-    client.close()
+    async def write_all() -> int:
+        written = 0
+        while (batch := await ready.get()) is not None:
+            await _write_batch(db, *batch)
+            written += len(batch[0])
+        return written
+
+    _, total = await asyncio.gather(embed_all(), write_all())
+
+    if not total:
+        print("All service types already have embeddings — nothing to do.")
+        return
+    print(f"Done — {total} embeddings stored.")
 
 
 if __name__ == "__main__":
-    embed_service_types()
+    asyncio.run(embed_service_types())
@@ -0,0 +1,34 @@
+"""
+Replace the legacy observation indexes with the compound geo index.
+
+Usage (from backend/):
+    python -m scripts.migrate_observation_indexes
+
+One-shot migration for databases created before observations were indexed on
+(category, service_type, location 2dsphere): drops the old single-field geo and
+category/service_type indexes and builds the compound one the app expects.
+Safe to re-run — indexes that are already gone are skipped.
+"""
+
+from pymongo import GEOSPHERE
+
+from scripts._db import get_db
+
+_LEGACY_INDEXES = ("location_2dsphere", "category_1_service_type_1")
+
+
+def migrate_observation_indexes():
+    collection = get_db().observations
+
+    existing = collection.index_information()
+    for name in _LEGACY_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+            print(f"  ✓ dropped {name}")
+
+    name = collection.create_index([("category", 1), ("service_type", 1), ("location", GEOSPHERE)])
+    print(f"Done — observations indexed by {name}.")
+
+
+if __name__ == "__main__":
+    migrate_observation_indexes()
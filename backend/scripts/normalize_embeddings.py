@@ -0,0 +1,40 @@
+"""
+Rescale every stored service-type embedding to unit L2 norm, stored as packed
+float32 binData.
+
+Usage (from backend/):
+    python -m scripts.normalize_embeddings
+
+One-shot migration for embeddings stored before the vector index switched to
+dotProduct similarity, or as arrays of doubles. Safe to re-run — vectors that
+are already packed and normalised are skipped.
+"""
+
+import numpy as np
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+from app.services.embeddings import from_bson_vector, normalize, to_bson_vector
+from scripts._db import get_db
+
+
+def normalize_embeddings():
+    db = get_db()
+    collection = db.service_types
+
+    ops = []
+    for doc in collection.find({"embedding": {"$exists": True}}, {"slug": 1, "embedding": 1}):
+        vec = from_bson_vector(doc["embedding"])
+        packed = isinstance(doc["embedding"], Binary)
+        if packed and abs(float(np.linalg.norm(vec)) - 1.0) < 1e-4:
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"embedding": to_bson_vector(normalize(vec))}}))
+        print(f"  ✓ {doc['slug']}")
+
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    print(f"Done — {len(ops)} embeddings rewritten.")
+
+
+if __name__ == "__main__":
+    normalize_embeddings()
@@ -2,21 +2,22 @@
 Seed script — populates Delhi demo data for local service providers.
 
 Usage (from backend/):
-    python -m scripts.seed
+    python -m scripts.seed [--region delhi]
 
 Idempotent: drops and recreates all data on each run.
-Also generates embeddings if OPENAI_API_KEY is set.
+Also generates embeddings if OPENAI_API_KEY is set, reusing any vectors already
+in the embedding_cache collection shared with embed_service_types.
 """
 
+import argparse
 import asyncio
-import random
 from datetime import datetime, timedelta, timezone
 
-from motor.motor_asyncio import AsyncIOMotorClient
+import numpy as np
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
 
 from app.config import settings
-
-random.seed(42)
+from scripts._db import get_async_db
 
 SERVICE_TYPES = [
     # Mechanic services
@@ -87,100 +88,131 @@ PROVIDERS = [
 
 SOURCE_TYPES = ["scrape", "manual", "receipt", "quote"]
 
+_PROVIDER_FIELDS = (
+    "name", "category", "address", "phone", "email", "website",
+    "rating", "review_count", "description",
+)
+
+
+def _normalize_providers(providers: list[dict]) -> list[dict]:
+    """Give every provider the same keys (None when unset) plus its GeoJSON location."""
+    return [
+        {
+            **{f: p.get(f) for f in _PROVIDER_FIELDS},
+            "location": {"type": "Point", "coordinates": [p["lng"], p["lat"]]},
+        }
+        for p in providers
+    ]
+
+
+# One entry per seedable region; add a region by adding its data here.
+DATA_SETS = {
+    "delhi": {
+        "city": "Delhi",
+        "currency": "INR",
+        "service_types": SERVICE_TYPES,
+        "price_ranges": PRICE_RANGES,
+        "providers": _normalize_providers(PROVIDERS),
+    },
+}
+
 
-async def seed():
-    client = AsyncIOMotorClient(settings.mongo_url)
-    db = client[settings.mongo_db]
+async def seed(region: str = "delhi"):
+    data = DATA_SETS[region]
+    service_types = data["service_types"]
+    price_ranges = data["price_ranges"]
+    providers = data["providers"]
+    db = get_async_db()
 
     print("Dropping existing collections...")
-    await db.service_types.drop()
-    await db.providers.drop()
-    await db.observations.drop()
+    await asyncio.gather(
+        db.service_types.drop(),
+        db.providers.drop(),
+        db.observations.drop(),
+    )
 
     now = datetime.now(timezone.utc)
 
     # --- Generate embeddings if possible ---
+    # Checked before importing anything OpenAI-related, which is slow to load.
     embeddings_available = False
-    try:
-        from app.services.embeddings import build_search_text, get_embeddings, is_available
-
-        if is_available():
-            emb = get_embeddings()
-            texts = [
-                build_search_text(st["name"], st["category"], st.get("description"))
-                for st in SERVICE_TYPES
-            ]
-            vectors = emb.embed_documents(texts)
-            for st, vec in zip(SERVICE_TYPES, vectors):
-                st["embedding"] = vec
+    if settings.openai_api_key:
+        import openai
+
+        from app.services.embeddings import build_search_text
+        from scripts.embed_service_types import cache_vectors, resolve_vectors
+
+        texts = [
+            build_search_text(st["name"], st["category"], st.get("description"))
+            for st in service_types
+        ]
+        try:
+            hashes, vectors_by_hash, new_hashes = await resolve_vectors(db, texts)
+        except openai.OpenAIError as e:
+            print(f"Skipping embeddings: {e}")
+        else:
+            for st, h in zip(service_types, hashes):
+                st["embedding"] = vectors_by_hash[h]
+            await cache_vectors(db, vectors_by_hash, new_hashes)
             embeddings_available = True
             print("Generated embeddings for service types.")
-    except Exception as e:
-        print(f"Skipping embeddings: {e}")
 
-    print(f"Inserting {len(SERVICE_TYPES)} service types...")
-    for st in SERVICE_TYPES:
+    print(f"Inserting {len(service_types)} service types and {len(providers)} providers...")
+    for st in service_types:
         st["created_at"] = now
-    await db.service_types.insert_many(SERVICE_TYPES)
-
-    print(f"Inserting {len(PROVIDERS)} providers...")
-    provider_docs = []
-    for p in PROVIDERS:
-        provider_docs.append({
-            "name": p["name"],
-            "category": p["category"],
-            "address": p["address"],
-            "city": "Delhi",
-            "phone": p.get("phone"),
-            "email": p.get("email"),
-            "website": p.get("website"),
-            "location": {"type": "Point", "coordinates": [p["lng"], p["lat"]]},
-            "rating": p.get("rating"),
-            "review_count": p.get("review_count"),
-            "description": p.get("description"),
-            "created_at": now,
-        })
-    result = await db.providers.insert_many(provider_docs)
+    locations = [p["location"] for p in providers]
+    provider_docs = [{**p, "city": data["city"], "created_at": now} for p in providers]
+    _, result = await asyncio.gather(
+        db.service_types.insert_many(service_types, ordered=False),
+        db.providers.insert_many(provider_docs, ordered=False),
+    )
     provider_ids = result.inserted_ids
 
     print("Generating ~150 observations...")
-    observations = []
-    for _ in range(150):
-        idx = random.randint(0, len(provider_docs) - 1)
-        provider = provider_docs[idx]
-        provider_id = provider_ids[idx]
-
-        service = random.choice(SERVICE_TYPES)
-        low, high = PRICE_RANGES[service["slug"]]
-        price = round(random.uniform(low, high), 2)
-
-        days_ago = random.randint(0, 90)
-        observed_at = now - timedelta(days=days_ago)
-
-        observations.append({
-            "provider_id": provider_id,
-            "service_type": service["slug"],
-            "category": service["category"],
+    rng = np.random.default_rng(42)
+    n = 150
+    lows, highs = np.array([price_ranges[st["slug"]] for st in service_types], dtype=float).T
+    provider_idx = rng.integers(0, len(locations), n)
+    service_idx = rng.integers(0, len(service_types), n)
+    prices = np.round(rng.uniform(lows[service_idx], highs[service_idx]), 2)
+    max_age_days = 90
+    days_ago = rng.integers(0, max_age_days + 1, n)
+    observed_dates = [now - timedelta(days=d) for d in range(max_age_days + 1)]
+    source_idx = rng.integers(0, len(SOURCE_TYPES), n)
+
+    observations = [
+        {
+            "provider_id": provider_ids[p_i],
+            "service_type": service_types[s_i]["slug"],
+            "category": service_types[s_i]["category"],
             "price": price,
-            "currency": "INR",
-            "source_type": random.choice(SOURCE_TYPES),
-            "location": provider["location"],
-            "observed_at": observed_at,
+            "currency": data["currency"],
+            "source_type": SOURCE_TYPES[src_i],
+            "location": locations[p_i],
+            "observed_at": observed_dates[days],
             "created_at": now,
-        })
-
-    await db.observations.insert_many(observations)
-
-    from pymongo import GEOSPHERE
-    await db.service_types.create_index("slug", unique=True)
-    await db.providers.create_index([("location", GEOSPHERE)])
-    await db.observations.create_index([("location", GEOSPHERE)])
-    await db.observations.create_index([("category", 1), ("service_type", 1)])
+        }
+        for p_i, s_i, price, days, src_i in zip(
+            provider_idx.tolist(), service_idx.tolist(), prices.tolist(),
+            days_ago.tolist(), source_idx.tolist(),
+        )
+    ]
+
+    await db.observations.insert_many(observations, ordered=False)
+
+    await asyncio.gather(
+        db.service_types.create_indexes([IndexModel("slug", unique=True)]),
+        db.providers.create_indexes([IndexModel([("location", GEOSPHERE)])]),
+        db.observations.create_indexes([
+            IndexModel([("category", ASCENDING), ("service_type", ASCENDING), ("location", GEOSPHERE)]),
+        ]),
+    )
 
     embed_note = " (with embeddings)" if embeddings_available else " (no embeddings — run embed_service_types)"
-    print(f"Done! Seeded {len(SERVICE_TYPES)} service types, {len(PROVIDERS)} providers, {len(observations)} observations{embed_note}.")
-    client.close()
+    print(f"Done! Seeded {len(service_types)} service types, {len(providers)} providers, {len(observations)} observations{embed_note}.")
 
 
 if __name__ == "__main__":
-    asyncio.run(seed())
+    parser = argparse.ArgumentParser(description="Seed demo data for one region.")
+    parser.add_argument("--region", choices=sorted(DATA_SETS), default="delhi")
+    asyncio.run(seed(parser.parse_args().region))